@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Measures resident memory taken by every connected receiver.
+
+A local socket.io server stands in for the receivers. The driver side is
+measured in separate processes for a shared and for per-device transport:
+RSS is read before devices are created and after all of them are connected,
+the difference is divided by the number of receivers.
+
+    python3 benchmarks/rss_per_receiver.py --receivers 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import socketio
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from wb_mqtt_urri.http_pool import HTTPPool
+from wb_mqtt_urri.main import URRIDevice
+from wb_mqtt_urri.transport import SharedTransport
+
+CONNECT_TIMEOUT = 60
+
+
+def rss_kib() -> int:
+    with open("/proc/self/status", "r", encoding="utf-8") as status_file:
+        for line in status_file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise RuntimeError("VmRSS is not available")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port: int) -> None:
+    sio = socketio.AsyncServer(async_mode="aiohttp")
+    app = web.Application()
+    sio.attach(app)
+
+    async def api(_):
+        return web.json_response([])
+
+    app.router.add_post("/{path:.*}", api)
+    web.run_app(app, host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+class NullMQTTDevice:  # pylint: disable=too-few-public-methods
+    def __getattr__(self, _):
+        return lambda *args, **kwargs: None
+
+
+async def measure(port: int, receivers: int, shared: bool) -> dict:
+    http_pool = HTTPPool(max_hosts=1)
+    transport = SharedTransport() if shared else None
+    rss_before = rss_kib()
+
+    devices = []
+    for number in range(receivers):
+        device = URRIDevice(
+            {
+                "device_id": f"bench-{number}",
+                "device_title": f"Bench {number}",
+                "urri_ip": "127.0.0.1",
+                "urri_port": port,
+            },
+            http_pool=http_pool,
+            transport=transport,
+        )
+        device.set_mqtt_device(NullMQTTDevice())
+        devices.append(device)
+    tasks = [asyncio.create_task(device.run()) for device in devices]
+
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    clients = [device._urri_client for device in devices]  # pylint: disable=protected-access
+    while not all(client.connected for client in clients):
+        if time.monotonic() > deadline:
+            raise RuntimeError("receivers are not connected in time")
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(1)
+    rss_after = rss_kib()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.gather(*[device.stop() for device in devices])
+    if transport is not None:
+        await transport.close()
+    http_pool.close()
+
+    return {
+        "transport": "shared" if shared else "separate",
+        "receivers": receivers,
+        "rss_kib": rss_after - rss_before,
+        "rss_per_receiver_kib": round((rss_after - rss_before) / receivers, 1),
+    }
+
+
+def run_child(*args) -> str:
+    return subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--receivers", type=int, default=100, help="Number of receivers to connect")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--measure", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--shared", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return 0
+    if args.measure:
+        result = asyncio.run(measure(args.measure, args.receivers, args.shared))
+        print(json.dumps(result))
+        return 0
+
+    port = free_port()
+    with subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)]) as server:
+        try:
+            for _ in range(50):
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            for shared in (False, True):
+                child_args = ["--measure", str(port), "--receivers", str(args.receivers)]
+                result = json.loads(run_child(*child_args, *(["--shared"] if shared else [])))
+                print(
+                    f"{result['transport']:>8}: {result['receivers']} receivers, "
+                    f"{result['rss_kib']} KiB, {result['rss_per_receiver_kib']} KiB per receiver"
+                )
+        finally:
+            server.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
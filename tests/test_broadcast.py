@@ -0,0 +1,94 @@
+import asyncio
+import json
+import time
+
+import requests
+
+from wb_mqtt_urri.broadcast import AlertBroadcast, BroadcastDevice
+from wb_mqtt_urri.main import URRIDevice
+
+ALERTS = ["fire.mp3", "lunch.mp3"]
+
+
+class DeviceMock:
+    def __init__(self, device_id, alerts=None, fail=False, error=requests.ConnectionError("timeout")):
+        self.id = device_id
+        self.alerts = ALERTS if alerts is None else alerts
+        self.fail = fail
+        self.error = error
+        self.played = []
+
+    def find_alert(self, alert_name):
+        return self.alerts.index(alert_name) if alert_name in self.alerts else None
+
+    def get_power(self):
+        time.sleep(0.01)
+        return True
+
+    def play_alert(self, alert_id, bounded=True):
+        assert not bounded
+        if self.fail:
+            raise self.error
+        self.played.append(alert_id)
+        return True
+
+
+def test_broadcast_to_all():
+    devices = [DeviceMock(f"urr{i}") for i in range(5)]
+    result = AlertBroadcast(devices).play("lunch.mp3")
+    assert all(device.played == [1] for device in devices)
+    assert result["skew_ms"] is not None
+    assert all(device_result["success"] for device_result in result["devices"].values())
+    assert min(device_result["offset_ms"] for device_result in result["devices"].values()) == 0
+
+
+def test_broadcast_to_targets():
+    devices = [
+        DeviceMock("urr1"),
+        DeviceMock("urr2", alerts=[]),
+        DeviceMock("urr3", fail=True),
+        DeviceMock("urr4"),
+    ]
+    result = AlertBroadcast(devices).play("fire.mp3", ["urr1", "urr2", "urr3", "urr5"])
+    assert devices[0].played == [0]
+    assert not devices[3].played
+    assert result["unknown"] == ["urr5"]
+    assert result["devices"]["urr2"] == {"success": False, "error": "alert not found"}
+    assert not result["devices"]["urr3"]["success"]
+    assert set(result["devices"]) == {"urr1", "urr2", "urr3"}
+
+
+def test_broadcast_with_wrong_response():
+    devices = [DeviceMock("urr1"), DeviceMock("urr2", fail=True, error=KeyError("success"))]
+    result = AlertBroadcast(devices).play("fire.mp3")
+    assert result["devices"]["urr1"]["success"]
+    assert not result["devices"]["urr2"]["success"]
+    assert "success" in result["devices"]["urr2"]["error"]
+
+
+def test_failed_broadcast_is_reported(mocker):
+    async def run():
+        broadcast_device = BroadcastDevice(mocker.Mock(), asyncio.get_running_loop(), [])
+        broadcast_device._device = mocker.Mock()  # pylint: disable=protected-access
+        mocker.patch.object(AlertBroadcast, "play", side_effect=KeyError("success"))
+        await broadcast_device._play_alert("fire.mp3", [])  # pylint: disable=protected-access
+        return broadcast_device._device  # pylint: disable=protected-access
+
+    device = asyncio.run(run())
+
+    device.set_control_error.assert_called_with("Play Alert", "w")
+    result = json.loads(device.set_control_value.call_args.args[1])
+    assert result == {"alert": "fire.mp3", "error": "KeyError('success')"}
+
+
+def test_alert_index_is_not_cached(mocker):
+    songs = [["fire.mp3", "lunch.mp3"], ["evacuation.mp3", "fire.mp3", "lunch.mp3"]]
+    http_pool = mocker.Mock()
+    http_pool.post.side_effect = [mocker.Mock(json=mocker.Mock(return_value=alerts)) for alerts in songs]
+    device = URRIDevice(
+        {"device_id": "urr1", "device_title": "urr1", "urri_ip": "127.0.0.1", "urri_port": 9032},
+        http_pool=http_pool,
+    )
+
+    assert device.find_alert("lunch.mp3") == 1
+    assert device.find_alert("/lunch.mp3") == 2
@@ -0,0 +1,51 @@
+import pytest
+import requests
+
+from wb_mqtt_urri.capture import Recorder, ReplayHTTP, read_capture
+
+
+def make_response(status_code, text):
+    response = requests.Response()
+    response.status_code = status_code
+    response.encoding = "utf-8"
+    response._content = text.encode("utf-8")  # pylint: disable=protected-access
+    return response
+
+
+def test_record_and_replay_http(tmp_path):
+    capture_filepath = str(tmp_path / "capture.jsonl")
+    recorder = Recorder(capture_filepath)
+    recorder.device("urr1", "Hall", "192.168.2.103", 9032)
+    recorder.status("urr1", {"volume": 30, "songTitle": "Song"})
+    recorder.http("urr1", "/getPower", None, make_response(200, "1"), 0.012)
+    recorder.http("urr1", "/getPower", None, make_response(200, "0"), 0.010)
+    recorder.close()
+
+    records = list(read_capture(capture_filepath))
+    assert [record["k"] for record in records] == ["device", "status", "http", "http"]
+    assert records[1]["s"] == {"volume": 30, "songTitle": "Song"}
+    assert records[2]["ms"] == 12.0
+
+    http = ReplayHTTP(records, {"urr1": "192.168.2.103:9032"})
+    assert http.post("http://192.168.2.103:9032/getPower").text == "1"
+    assert http.post("http://192.168.2.103:9032/getPower").text == "0"
+    assert http.post("http://192.168.2.103:9032/getPower").text == "0"
+    unknown = http.post("http://192.168.2.103:9032/next")
+    assert unknown.status_code == 200
+    assert unknown.text == ""
+
+
+def test_record_and_replay_http_error(tmp_path):
+    capture_filepath = str(tmp_path / "capture.jsonl")
+    recorder = Recorder(capture_filepath)
+    recorder.http_error("urr1", "/getPower", None, requests.exceptions.ConnectTimeout("timed out"), 2.0)
+    recorder.http("urr1", "/getPower", None, make_response(200, "1"), 0.012)
+    recorder.close()
+
+    records = list(read_capture(capture_filepath))
+    assert records[0]["e"] == ["ConnectTimeout", "timed out"]
+
+    http = ReplayHTTP(records, {"urr1": "192.168.2.103:9032"})
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        http.post("http://192.168.2.103:9032/getPower", bounded=False)
+    assert http.post("http://192.168.2.103:9032/getPower").text == "1"
@@ -0,0 +1,115 @@
+import asyncio
+
+import requests
+
+from wb_mqtt_urri.catalogue import Catalogue
+from wb_mqtt_urri.main import URRIDevice
+
+RESPONSES = {
+    Catalogue.PRESETS_PATH: [{"index": 0, "name": "Jazz"}, {"index": 1, "name": "Rock FM"}],
+    Catalogue.USER_RADIOS_PATH: [{"id": 1001, "name": "Office Radio"}],
+    Catalogue.USB_FOLDERS_PATH: ["usb1/Music", "/usb1/Ads/"],
+}
+
+
+def make_catalogue():
+    catalogue = Catalogue()
+    catalogue.load(RESPONSES.get)
+    return catalogue
+
+
+def test_lookup_by_name():
+    catalogue = make_catalogue()
+    assert catalogue.find_preset("rock fm ") == 1
+    assert catalogue.find_preset("Pop") is None
+    assert catalogue.find_radio("OFFICE RADIO") == 1001
+    assert catalogue.find_radio("Jazz") is None
+    assert catalogue.has_folder("usb1/ads")
+    assert not catalogue.has_folder("usb1/Video")
+
+
+def test_unloaded_catalogue_does_not_block_folders():
+    catalogue = Catalogue()
+    assert catalogue.has_folder("usb1/Video")
+    assert not catalogue.is_outdated({"sourceType": 2, "index": 5, "name": "New"})
+
+
+def test_outdated_source():
+    catalogue = make_catalogue()
+    assert not catalogue.is_outdated({"sourceType": 2, "index": 0, "name": "Jazz"})
+    assert catalogue.is_outdated({"sourceType": 2, "index": 0, "name": "Blues"})
+    assert not catalogue.is_outdated({"sourceType": 5, "id": 1001, "name": "Office Radio"})
+    assert catalogue.is_outdated({"sourceType": 5, "id": 1002, "name": "Hall Radio"})
+    assert not catalogue.is_outdated({"sourceType": 0, "id": 1, "name": "Any"})
+
+
+def test_lists_are_loaded_independently():
+    def fetch(path):
+        if path == Catalogue.PRESETS_PATH:
+            raise OSError("timed out")
+        if path == Catalogue.USB_FOLDERS_PATH:
+            return {"error": "not found"}
+        return RESPONSES[path]
+
+    catalogue = Catalogue()
+    failed = catalogue.load(fetch)
+
+    assert sorted(failed) == [Catalogue.PRESETS_PATH, Catalogue.USB_FOLDERS_PATH]
+    assert isinstance(failed[Catalogue.USB_FOLDERS_PATH], TypeError)
+    assert not catalogue.loaded
+    assert catalogue.find_radio("Office Radio") == 1001
+    assert catalogue.has_folder("usb1/Video")
+
+    assert not catalogue.load(RESPONSES.get)
+    assert catalogue.loaded
+    assert catalogue.find_preset("Jazz") == 0
+
+
+def test_failed_list_keeps_previous_content():
+    catalogue = make_catalogue()
+    catalogue.load(lambda path: RESPONSES[path] if path != Catalogue.PRESETS_PATH else "error")
+
+    assert catalogue.find_preset("Jazz") == 0
+    assert catalogue.loaded
+
+
+def test_nested_folders():
+    catalogue = make_catalogue()
+    assert catalogue.has_folder("usb1/Music/Rock")
+    assert catalogue.has_folder("/usb1/ads/2024/")
+    assert not catalogue.has_folder("usb1/Video/Films")
+
+
+def test_whole_drive():
+    catalogue = make_catalogue()
+    assert catalogue.has_folder("usb1")
+    assert catalogue.has_folder("/usb1/")
+    assert not catalogue.has_folder("usb2")
+
+
+def test_catalogue_load_retried(mocker):
+    responses = {path: mocker.Mock(json=mocker.Mock(return_value=items)) for path, items in RESPONSES.items()}
+    not_found = mocker.Mock()
+    not_found.raise_for_status.side_effect = requests.HTTPError("404")
+    calls = []
+
+    def post(url, **_):
+        path = url[len("http://127.0.0.1:9032") :]
+        calls.append(path)
+        if path == Catalogue.PRESETS_PATH and calls.count(path) == 1:
+            return not_found
+        return responses[path]
+
+    http_pool = mocker.Mock()
+    http_pool.post.side_effect = post
+    mocker.patch.object(URRIDevice, "CATALOGUE_RETRY_DELAY", 0)
+    device = URRIDevice(
+        {"device_id": "urr1", "device_title": "urr1", "urri_ip": "127.0.0.1", "urri_port": 9032},
+        http_pool=http_pool,
+    )
+    device._urri_client.connected = True  # pylint: disable=protected-access
+
+    asyncio.run(device._load_catalogue())  # pylint: disable=protected-access
+
+    assert calls.count(Catalogue.PRESETS_PATH) == 2
+    assert device._catalogue.loaded  # pylint: disable=protected-access
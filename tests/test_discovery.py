@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from wb_mqtt_urri.discovery import (
+    Discovery,
+    config_fragment,
+    parse_subnets,
+    read_arp_table,
+    subnets_of,
+)
+
+ARP_TABLE = """IP address       HW type     Flags       HW address            Mask     Device
+127.0.0.1        0x1         0x2         AA:BB:CC:00:11:22     *        eth0
+127.0.0.3        0x1         0x0         00:00:00:00:00:00     *        eth0
+"""
+
+
+async def start_server(host, port=0, handshake="0{}"):
+    async def get_power(_):
+        return web.Response(text="1")
+
+    async def handshake_handler(_):
+        return web.Response(text=handshake)
+
+    app = web.Application()
+    app.router.add_post("/getPower", get_power)
+    app.router.add_get("/socket.io/", handshake_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+
+
+def test_scan(tmp_path):
+    arp_filepath = tmp_path / "arp"
+    arp_filepath.write_text(ARP_TABLE, encoding="utf-8")
+
+    async def run():
+        runner, port = await start_server("127.0.0.1")
+        other_runner, _ = await start_server("127.0.0.2", port, handshake="not engine.io")
+        try:
+            discovery = Discovery(port=port, max_concurrency=2, arp_table_filepath=str(arp_filepath))
+            return port, await discovery.scan(["127.0.0.0/30"])
+        finally:
+            await runner.cleanup()
+            await other_runner.cleanup()
+
+    port, receivers = asyncio.run(run())
+
+    assert receivers == [{"urri_ip": "127.0.0.1", "urri_port": port, "urri_mac": "aa:bb:cc:00:11:22"}]
+
+
+def test_scan_refuses_large_subnets():
+    with pytest.raises(ValueError):
+        asyncio.run(Discovery().scan(["10.0.0.0/8"]))
+
+
+def test_read_arp_table(tmp_path):
+    arp_filepath = tmp_path / "arp"
+    arp_filepath.write_text(ARP_TABLE, encoding="utf-8")
+
+    assert read_arp_table(str(arp_filepath)) == {"127.0.0.1": "aa:bb:cc:00:11:22"}
+    assert not read_arp_table(str(tmp_path / "nonexistent"))
+
+
+def test_subnets_of():
+    subnets = subnets_of(["192.168.1.10", "192.168.1.20", "192.168.2.1", "urri.local", ""])
+
+    assert [str(subnet) for subnet in subnets] == ["192.168.1.0/24", "192.168.2.0/24"]
+
+
+def test_parse_subnets():
+    subnets = parse_subnets(["192.168.1.0/24", "999.1.1.1/24", "10.0.0.5/16", "10.0.0.0/8", "0.0.0.0/0"])
+
+    assert [str(subnet) for subnet in subnets] == ["192.168.1.0/24", "10.0.0.0/16"]
+
+
+def test_config_fragment():
+    devices_config = [
+        {"device_id": "hall", "device_title": "Hall", "urri_ip": "192.168.1.5", "urri_port": 9032},
+        {
+            "device_id": "kitchen",
+            "device_title": "Kitchen",
+            "urri_ip": "192.168.1.6",
+            "urri_port": 9032,
+            "urri_mac": "AA:BB:CC:00:11:22",
+        },
+    ]
+    receivers = [
+        {"urri_ip": "192.168.1.5", "urri_port": 9032, "urri_mac": None},
+        {"urri_ip": "192.168.1.7", "urri_port": 9032, "urri_mac": "aa:bb:cc:00:11:22"},
+        {"urri_ip": "192.168.1.8", "urri_port": 9032, "urri_mac": "aa:bb:cc:00:11:33"},
+    ]
+
+    assert config_fragment(receivers, devices_config) == {
+        "devices": [
+            {"device_id": "hall", "device_title": "Hall", "urri_ip": "192.168.1.5", "urri_port": 9032},
+            {
+                "device_id": "kitchen",
+                "device_title": "Kitchen",
+                "urri_ip": "192.168.1.7",
+                "urri_port": 9032,
+                "urri_mac": "aa:bb:cc:00:11:22",
+            },
+            {
+                "device_id": "urri_aabbcc001133",
+                "device_title": "URRI 192.168.1.8",
+                "urri_ip": "192.168.1.8",
+                "urri_port": 9032,
+                "urri_mac": "aa:bb:cc:00:11:33",
+            },
+        ]
+    }
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from wb_mqtt_urri.http_pool import HTTPPool
+from wb_mqtt_urri.main import URRIDevice
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        if self.path == "/slow":
+            with Handler.lock:
+                Handler.in_flight += 1
+                Handler.peak = max(Handler.peak, Handler.in_flight)
+            time.sleep(0.1)
+            with Handler.lock:
+                Handler.in_flight -= 1
+        body = b'{"success": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused(server_url):
+    pool = HTTPPool()
+    for _ in range(5):
+        assert pool.post(server_url + "/getPower").json()["success"]
+    assert pool.stats() == {"requests": 5, "connections": 1, "reuse": 80.0, "errors": 0}
+    pool.close()
+
+
+def test_concurrency_is_capped(server_url):
+    pool = HTTPPool(max_concurrency=3, connections_per_host=10)
+    Handler.peak = 0
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        responses = list(executor.map(lambda _: pool.post(server_url + "/slow"), range(10)))
+    pool.close()
+
+    assert all(response.json()["success"] for response in responses)
+    assert Handler.peak == 3
+
+
+def test_errors_are_counted():
+    pool = HTTPPool(connect_timeout=0.5)
+    with pytest.raises(requests.RequestException):
+        pool.post("http://127.0.0.1:1/getPower")
+    assert pool.stats()["errors"] == 1
+
+
+def test_status_message_does_not_block_event_loop(mocker):
+    threads = []
+
+    def post(**_):
+        threads.append(threading.current_thread())
+        return mocker.Mock(content=b"1")
+
+    http_pool = mocker.Mock()
+    http_pool.post.side_effect = post
+    device = URRIDevice(
+        {"device_id": "urr1", "device_title": "urr1", "urri_ip": "127.0.0.1", "urri_port": 9032},
+        http_pool=http_pool,
+    )
+    device.set_mqtt_device(mocker.Mock())
+
+    asyncio.run(device.on_status_message({"volume": 30}))
+
+    assert threads and threading.main_thread() not in threads
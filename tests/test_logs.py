@@ -0,0 +1,33 @@
+import logging
+
+from wb_mqtt_urri.logs import DeviceLogger, SamplingFilter, StructuredFormatter
+
+
+def make_record(msg, **extra):
+    record = logging.LogRecord("wb_mqtt_urri.status", logging.DEBUG, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampling_filter():
+    sampling_filter = SamplingFilter(interval=60)
+    assert sampling_filter.filter(make_record("no key"))
+    assert sampling_filter.filter(make_record("no key"))
+    assert sampling_filter.filter(make_record("first", sample_key="urr1"))
+    assert not sampling_filter.filter(make_record("second", sample_key="urr1"))
+    assert sampling_filter.filter(make_record("other", sample_key="urr2"))
+
+
+def test_structured_formatter():
+    record = make_record('volume "set"', device="urr1", suppressed=3)
+    assert StructuredFormatter().format(record) == (
+        'level=debug subsystem=status device=urr1 msg="volume \\"set\\"" suppressed=3'
+    )
+
+
+def test_device_logger_debug_switch():
+    logger = logging.getLogger("wb_mqtt_urri.test")
+    logger.setLevel(logging.DEBUG)
+    assert DeviceLogger(logger, "urr1", debug=True).isEnabledFor(logging.DEBUG)
+    assert not DeviceLogger(logger, "urr2").isEnabledFor(logging.DEBUG)
+    assert DeviceLogger(logger, "urr2").isEnabledFor(logging.INFO)
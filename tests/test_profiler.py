@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from wb_mqtt_urri.profiler import SamplingProfiler, dump_tasks, register_task
+
+
+def busy_loop(duration):
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        pass
+
+
+def test_sampling_profiler(tmp_path):
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_loop(0.1)
+    profiler.stop()
+
+    assert profiler.samples > 0
+    top = profiler.top_functions(3)
+    assert any(function["function"].startswith("busy_loop") for function in top)
+
+    profile_filepath = tmp_path / "wb-mqtt-urri" / "profile.collapsed"
+    profiler.write_collapsed(str(profile_filepath))
+    assert "busy_loop" in profile_filepath.read_text(encoding="utf-8")
+
+
+def test_dump_tasks():
+    async def run():
+        task = asyncio.create_task(asyncio.sleep(10), name="urr1-run")
+        register_task(task, "urr1")
+        await asyncio.sleep(0)
+        tasks = dump_tasks()
+        task.cancel()
+        return tasks
+
+    tasks = asyncio.run(run())
+    assert [task["name"] for task in tasks["urr1"]] == ["urr1-run"]
+    assert tasks["urr1"][0]["age"] is not None
+    assert tasks["other"][0]["age"] is None
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+import threading
+
+from wb_mqtt_urri.state_cache import StateCache
+
+
+def test_missing_file_gives_empty_state(tmp_path):
+    cache = StateCache(str(tmp_path / "state.json"))
+    cache.load()
+    assert not cache.get("urr1")
+
+
+def test_state_roundtrip(tmp_path):
+    filepath = tmp_path / "sub" / "state.json"
+    cache = StateCache(str(filepath))
+    cache.update("urr1", {"Volume": 30, "Power": True, "Song Title": "Song"})
+    cache.flush()
+
+    restored = StateCache(str(filepath))
+    restored.load()
+    assert restored.get("urr1") == {"Volume": 30, "Power": True, "Song Title": "Song"}
+    assert not list(filepath.parent.glob(".state-*"))
+
+
+def test_corrupted_file_is_ignored(tmp_path):
+    filepath = tmp_path / "state.json"
+    filepath.write_text("{broken", encoding="utf-8")
+    cache = StateCache(str(filepath))
+    cache.load()
+    assert not cache.get("urr1")
+
+
+def test_writes_are_debounced(tmp_path, mocker):
+    filepath = tmp_path / "state.json"
+    cache = StateCache(str(filepath), flush_delay=0.05)
+    replace = mocker.spy(os, "replace")
+
+    async def run():
+        for volume in range(10):
+            cache.update("urr1", {"Volume": volume})
+        assert not filepath.exists()
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert replace.call_count == 1
+    assert json.loads(filepath.read_text(encoding="utf-8")) == {"urr1": {"Volume": 9}}
+
+
+def test_debounced_write_is_off_event_loop(tmp_path, mocker):
+    cache = StateCache(str(tmp_path / "state.json"), flush_delay=0.01)
+    threads = []
+    fsync = os.fsync
+    mocker.patch(
+        "wb_mqtt_urri.state_cache.os.fsync",
+        side_effect=lambda fd: threads.append(threading.current_thread()) or fsync(fd),
+    )
+
+    async def run():
+        cache.update("urr1", {"Volume": 30})
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert threads and threading.main_thread() not in threads
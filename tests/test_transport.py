@@ -0,0 +1,55 @@
+import asyncio
+
+from wb_mqtt_urri.main import URRIDevice
+from wb_mqtt_urri.transport import SharedTransport
+
+
+def make_device(device_id, transport):
+    properties = {
+        "device_id": device_id,
+        "device_title": device_id,
+        "urri_ip": "127.0.0.1",
+        "urri_port": 9032,
+    }
+    return URRIDevice(properties, transport=transport)
+
+
+def test_devices_share_session():
+    async def run():
+        transport = SharedTransport()
+        devices = [make_device("urr1", transport), make_device("urr2", transport)]
+        clients = [device._urri_client.eio for device in devices]  # pylint: disable=protected-access
+        sessions = [client.http for client in clients]
+        external = [client.external_http for client in clients]
+        session = transport.session()
+        await transport.close()
+        return sessions, external, session
+
+    sessions, external, session = asyncio.run(run())
+
+    assert sessions == [session, session]
+    assert external == [True, True]
+    assert session.closed
+
+
+def test_session_recreated_after_close():
+    async def run():
+        transport = SharedTransport()
+        first = transport.session()
+        await transport.close()
+        second = transport.session()
+        await transport.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first is not second
+    assert second.closed
+
+
+def test_device_without_transport():
+    async def run():
+        device = make_device("urr1", None)
+        return device._urri_client.eio.http  # pylint: disable=protected-access
+
+    assert asyncio.run(run()) is None
@@ -1,6 +1,9 @@
 import asyncio
+import json
 
-from wb_mqtt_urri.main import URRIClient
+import pytest
+
+from wb_mqtt_urri.main import URRIClient, URRIDevice, replay, to_json
 
 TEST_CONFIG = {
     "debug": True,
@@ -11,11 +14,13 @@ TEST_CONFIG = {
 
 
 class URRIDeviceMock:
-    def __init__(self, properties):
+    def __init__(self, properties, state_cache=None, http_pool=None, **_):  # pylint: disable=unused-argument
         assert properties == TEST_CONFIG["devices"][0]
         self.id = properties["device_id"]
         self.title = properties["device_title"]
         self.ip = properties["urri_ip"]
+        self.debug = properties.get("debug", False)
+        self.properties = state_cache.get(self.id) if state_cache else {}
 
     def set_mqtt_device(self, _):
         pass
@@ -37,7 +42,8 @@ def test_mosquitto_restart(mocker):
     mocked.return_value.publish.side_effect = publish
     mocker.patch("wb_mqtt_urri.main.URRIDevice", side_effect=URRIDeviceMock)
     mocker.patch("wb_mqtt_urri.main.MQTTDevice.remove")
-    urri_client = URRIClient(TEST_CONFIG["devices"])
+    mocker.patch("wb_mqtt_urri.wbmqtt.ServiceDevice.remove")
+    urri_client = URRIClient(TEST_CONFIG["devices"], state_filepath="/nonexistent/state.json")
 
     asyncio.run(urri_client.run())
     old_publications = publications
@@ -46,3 +52,108 @@ def test_mosquitto_restart(mocker):
     urri_client._mqtt_client.on_disconnect(None, None, None)  # pylint: disable=protected-access
     urri_client._mqtt_client.on_connect(None, None, None, 0)  # pylint: disable=protected-access
     assert old_publications == publications
+
+
+def test_replay(mocker, tmp_path):
+    capture_filepath = tmp_path / "capture.jsonl"
+    records = [
+        {"t": 0, "k": "device", "d": "urr1", "title": "urr1", "ip": "192.168.2.103", "port": 9032},
+        {"t": 0.1, "k": "http", "d": "urr1", "p": "/getPower", "q": None, "c": 200, "r": "1", "ms": 5},
+        {"t": 0.1, "k": "status", "d": "urr1", "s": {"volume": 30, "songTitle": "Song"}},
+        {"t": 0.2, "k": "status", "d": "urr1", "s": {"volume": 35, "songTitle": "Song"}},
+    ]
+    capture_filepath.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+    publications = []
+
+    def publish(topic, value, retain):  # pylint: disable=unused-argument
+        publications.append((topic, value))
+
+    mqtt_client = mocker.Mock()
+    mqtt_client.publish.side_effect = publish
+    result = asyncio.run(replay(str(capture_filepath), mqtt_client, speed=0))
+
+    assert result["events"] == 2
+    assert ("/devices/replay-urr1/controls/Power", "1") in publications
+    assert ("/devices/replay-urr1/controls/Volume", 30) in publications
+    assert ("/devices/replay-urr1/controls/Volume", 35) in publications
+
+
+def test_follow_moved_devices(mocker):
+    moved = mocker.Mock(connected=False, mac="aa:bb:cc:00:11:22", ip="192.168.2.103", port=9032)
+    online = mocker.Mock(connected=True, mac="aa:bb:cc:00:11:33", ip="192.168.2.104", port=9032)
+    scan = mocker.patch("wb_mqtt_urri.main.Discovery.scan")
+    scan.return_value = [
+        {"urri_ip": "192.168.2.110", "urri_port": 9032, "urri_mac": "aa:bb:cc:00:11:22"},
+        {"urri_ip": "192.168.2.111", "urri_port": 9032, "urri_mac": "aa:bb:cc:00:11:33"},
+    ]
+    urri_client = URRIClient(
+        TEST_CONFIG["devices"], state_filepath="/nonexistent/state.json", discovery_interval=0.01
+    )
+    urri_client._urri_devices = [moved, online]  # pylint: disable=protected-access
+
+    async def run():
+        task = asyncio.create_task(urri_client._follow_moved_devices())  # pylint: disable=protected-access
+        while not moved.set_address.called:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+
+    assert [str(subnet) for subnet in scan.call_args.args[0]] == ["192.168.2.0/24"]
+    moved.set_address.assert_called_with("192.168.2.110", 9032)
+    online.set_address.assert_not_called()
+
+
+def test_follow_moved_devices_backoff(mocker):
+    moved = mocker.Mock(connected=False, mac="aa:bb:cc:00:11:22", ip="192.168.2.103", port=9032)
+    scan = mocker.patch("wb_mqtt_urri.main.Discovery.scan")
+    scan.side_effect = [
+        OSError("Network is unreachable"),
+        [],
+        [{"urri_ip": "192.168.2.110", "urri_port": 9032, "urri_mac": "aa:bb:cc:00:11:22"}],
+    ]
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+        if len(delays) > 3:
+            raise asyncio.CancelledError()
+
+    mocker.patch("wb_mqtt_urri.main.asyncio.sleep", side_effect=sleep)
+    urri_client = URRIClient(
+        TEST_CONFIG["devices"],
+        state_filepath="/nonexistent/state.json",
+        discovery_interval=10,
+        discovery_subnets=["999.1.1.1/24", "192.168.2.0/24"],
+    )
+    urri_client._urri_devices = [moved]  # pylint: disable=protected-access
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(urri_client._follow_moved_devices())  # pylint: disable=protected-access
+
+    assert [str(subnet) for subnet in scan.call_args.args[0]] == ["192.168.2.0/24"]
+    assert delays == [10, 20, 40, 10]
+    moved.set_address.assert_called_once_with("192.168.2.110", 9032)
+
+
+def test_set_address(mocker):
+    async def run():
+        device = URRIDevice(TEST_CONFIG["devices"][0])
+        device.set_mqtt_device(mocker.Mock())
+        client = device._urri_client  # pylint: disable=protected-access
+        client.connection_url = "http://192.168.2.103:9032"
+        device.set_address("192.168.2.110", 9033)
+        return device, client
+
+    device, client = asyncio.run(run())
+
+    assert (device.ip, device.port) == ("192.168.2.110", 9033)
+    assert client.connection_url == "http://192.168.2.110:9033"
+
+
+def test_to_json_without_devices(tmp_path):
+    config_filepath = tmp_path / "wb-mqtt-urri.conf"
+    config_filepath.write_text('{"debug": false}', encoding="utf-8")
+
+    assert not to_json(str(config_filepath))
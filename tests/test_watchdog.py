@@ -0,0 +1,104 @@
+import asyncio
+
+import socketio
+
+from wb_mqtt_urri.main import URRIDevice
+from wb_mqtt_urri.watchdog import Liveness
+
+
+class EioClientMock:  # pylint: disable=too-few-public-methods
+    def __init__(self):
+        self.packets = []
+
+    async def _receive_packet(self, pkt):
+        self.packets.append(pkt)
+
+
+def test_liveness(mocker):
+    monotonic = mocker.patch("wb_mqtt_urri.watchdog.time.monotonic", return_value=100.0)
+    liveness = Liveness(timeout=60)
+    assert liveness.age() is None
+    assert not liveness.is_stale()
+
+    liveness.touch_status()
+    monotonic.return_value = 130.0
+    assert liveness.age() == 30
+    assert not liveness.is_stale()
+
+    monotonic.return_value = 161.0
+    assert liveness.is_stale()
+    assert liveness.status_age() == 61
+
+    liveness.record_rtt(0.02)
+    assert liveness.rtt == 0.02
+    assert liveness.rtt_age() == 0
+
+
+def test_engineio_packets_keep_session_alive(mocker):
+    monotonic = mocker.patch("wb_mqtt_urri.watchdog.time.monotonic", return_value=100.0)
+    eio_client = EioClientMock()
+    liveness = Liveness(timeout=60)
+    liveness.attach(eio_client)
+
+    monotonic.return_value = 150.0
+    asyncio.run(eio_client._receive_packet("ping"))  # pylint: disable=protected-access
+    monotonic.return_value = 200.0
+    assert eio_client.packets == ["ping"]
+    assert liveness.age() == 50
+    assert liveness.status_age() is None
+
+
+def make_device(mocker):
+    device = URRIDevice(
+        {"device_id": "urr1", "device_title": "urr1", "urri_ip": "127.0.0.1", "urri_port": 9032}
+    )
+    device.set_mqtt_device(mocker.Mock())
+    return device
+
+
+async def hang(*_, **__):
+    await asyncio.Event().wait()
+
+
+def test_stuck_session_close_recreates_client(mocker):
+    mocker.patch.object(URRIDevice, "DISCONNECT_TIMEOUT", 0.1)
+    mocker.patch.object(URRIDevice, "_watchdog", return_value=True)
+
+    async def run():
+        device = make_device(mocker)
+        client = device._urri_client  # pylint: disable=protected-access
+
+        async def disconnect(abort=False):  # pylint: disable=unused-argument
+            client.eio.state = "disconnecting"
+            await hang()
+
+        device._liveness.touch()  # pylint: disable=protected-access
+        client.wait = hang
+        client.eio.state = "connected"
+        client.eio.disconnect = disconnect
+        await device._wait_alive()  # pylint: disable=protected-access
+        return client, device._urri_client  # pylint: disable=protected-access
+
+    old_client, new_client = asyncio.run(asyncio.wait_for(run(), 5))
+
+    assert new_client is not old_client
+    assert new_client.eio.state == "disconnected"
+
+
+def test_last_seen_is_updated_while_disconnected(mocker):
+    mocker.patch(
+        "wb_mqtt_urri.main.socketio.AsyncClient.connect",
+        side_effect=socketio.exceptions.ConnectionError("refused"),
+    )
+    mocker.patch("wb_mqtt_urri.main.asyncio.sleep", side_effect=asyncio.CancelledError)
+
+    async def run():
+        device = make_device(mocker)
+        device._liveness.touch()  # pylint: disable=protected-access
+        await device.run()
+        return device._mqtt_device  # pylint: disable=protected-access
+
+    mqtt_device = asyncio.run(run())
+
+    mqtt_device.set_error_state.assert_called_with(True)
+    mqtt_device.update.assert_called_with("Last Seen", 0)
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from wb_common.mqtt_client import MQTTClient
+
+from wb_mqtt_urri import wbmqtt
+
+logger = logging.getLogger("wb_mqtt_urri.command")
+
+
+class AlertBroadcast:  # pylint: disable=too-few-public-methods
+    """Plays an alert on many receivers at once.
+
+    Broadcast goes in two phases. At first alert indexes are resolved and
+    keep-alive connections are opened on all targets concurrently. Then all
+    ``/alert/notify`` requests are released together by a barrier, so the
+    start-time skew across receivers is limited by thread wake-up, not by
+    network round trips.
+    """
+
+    BARRIER_TIMEOUT = 5
+
+    def __init__(self, devices: list) -> None:
+        self._devices = devices
+
+    def play(self, alert_name: str, target_ids: list = None) -> dict:
+        devices = {device.id: device for device in self._devices}
+        target_ids = target_ids or list(devices)
+        result = {
+            "alert": alert_name,
+            "skew_ms": None,
+            "devices": {},
+            "unknown": [device_id for device_id in target_ids if device_id not in devices],
+        }
+        targets = [devices[device_id] for device_id in target_ids if device_id in devices]
+        if not targets:
+            return result
+
+        with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="alert-broadcast") as executor:
+            alert_ids = list(executor.map(lambda device: self._prepare(device, alert_name), targets))
+            ready = [
+                (device, alert_id) for device, alert_id in zip(targets, alert_ids) if alert_id is not None
+            ]
+            for device, alert_id in zip(targets, alert_ids):
+                if alert_id is None:
+                    result["devices"][device.id] = {"success": False, "error": "alert not found"}
+
+            if ready:
+                barrier = threading.Barrier(len(ready))
+                fired = executor.map(lambda target: self._fire(*target, barrier), ready)
+                result["devices"].update(dict(zip((device.id for device, _ in ready), fired)))
+
+        started = [device_result for device_result in result["devices"].values() if "start" in device_result]
+        result["skew_ms"] = self._set_offsets(started)
+        logger.info(
+            "Alert %s broadcast to %d receivers, start skew %s ms",
+            alert_name,
+            len(started),
+            result["skew_ms"],
+        )
+        return result
+
+    @staticmethod
+    def _set_offsets(started: list):
+        """Replaces start times with offsets from the earliest start, returns the largest offset"""
+        if not started:
+            return None
+        first_start = min(device_result["start"] for device_result in started)
+        for device_result in started:
+            device_result["offset_ms"] = round(1000 * (device_result.pop("start") - first_start), 2)
+        return max(device_result["offset_ms"] for device_result in started)
+
+    @staticmethod
+    def _prepare(device, alert_name: str):
+        try:
+            alert_id = device.find_alert(alert_name)
+            if alert_id is not None:
+                device.get_power()  # leaves an open keep-alive connection in the pool
+            return alert_id
+        except requests.RequestException as e:
+            logger.warning("Can't prepare alert broadcast on URRI %s: %s", device.id, e)
+            return None
+
+    def _fire(self, device, alert_id: int, barrier: threading.Barrier) -> dict:
+        try:
+            barrier.wait(self.BARRIER_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+        start = time.monotonic()
+        try:
+            success = device.play_alert(alert_id, bounded=False)
+            error = None
+        except requests.RequestException as e:
+            success = False
+            error = str(e)
+        except (KeyError, TypeError) as e:
+            # the reply has no "success" field
+            success = False
+            error = f"wrong response: {e!r}"
+        device_result = {
+            "success": success,
+            "start": start,
+            "latency_ms": round(1000 * (time.monotonic() - start), 2),
+        }
+        if error:
+            device_result["error"] = error
+        return device_result
+
+
+class BroadcastDevice(wbmqtt.ServiceDevice):
+    DEVICE_ID = "wb-mqtt-urri-broadcast"
+    DEVICE_TITLE = "URRI alert broadcast"
+
+    def __init__(self, mqtt_client: MQTTClient, event_loop, urri_devices: list):
+        super().__init__(mqtt_client)
+        self._event_loop = event_loop
+        self._broadcast = AlertBroadcast(urri_devices)
+        self._broadcast_future = None
+
+    def _create_controls(self):
+        self._device.create_control(
+            "Targets",
+            wbmqtt.ControlMeta(title="Targets", control_type="text", order=1, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Play Alert",
+            wbmqtt.ControlMeta(title="Play Alert", control_type="text", order=2, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Start Skew",
+            wbmqtt.ControlMeta(title="Start Skew, ms", control_type="value", order=3, read_only=True),
+            0,
+        )
+        self._device.create_control(
+            "Result",
+            wbmqtt.ControlMeta(title="Result", control_type="text", order=4, read_only=True),
+            "",
+        )
+
+    def _subscribe_on_topics(self):
+        self._device.add_control_message_callback("Targets", self._on_message_targets)
+        self._device.add_control_message_callback("Play Alert", self._on_message_play_alert)
+
+    def _on_message_targets(self, _, __, msg):
+        self._device.set_control_value("Targets", msg.payload.decode("utf-8"))
+
+    def _on_message_play_alert(self, _, __, msg):
+        alert = msg.payload.decode("utf-8").strip()
+        if not alert:
+            return
+        if self._broadcast_future is not None and not self._broadcast_future.done():
+            logger.warning("Alert broadcast is already running")
+            self._device.set_control_error("Play Alert", "w")
+            return
+        targets = self._device.get_control_value("Targets").replace(",", " ").split()
+        self._broadcast_future = asyncio.run_coroutine_threadsafe(
+            self._play_alert(alert, targets), self._event_loop
+        )
+
+    async def _play_alert(self, alert: str, targets: list):
+        try:
+            result = await self._event_loop.run_in_executor(None, self._broadcast.play, alert, targets)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.exception("Alert %s broadcast failed", alert)
+            self._device.set_control_error("Play Alert", "w")
+            self._device.set_control_value("Result", json.dumps({"alert": alert, "error": repr(e)}))
+            return
+        success = bool(result["devices"]) and all(device["success"] for device in result["devices"].values())
+        self._device.set_control_error("Play Alert", "" if success and not result["unknown"] else "w")
+        self._device.set_control_value("Start Skew", result["skew_ms"] or 0)
+        self._device.set_control_value("Result", json.dumps(result))
@@ -0,0 +1,119 @@
+import collections
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+
+def _compact(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class Recorder:
+    """Writes receiver traffic to a JSON lines capture file.
+
+    Every line has ``t`` (seconds since capture start), ``k`` (record kind) and
+    ``d`` (device id) keys:
+
+    - ``device``: receiver description, written once per device;
+    - ``status``: socket.io status event, ``s`` is the event payload;
+    - ``http``: API request, ``p`` path, ``q`` request body, ``c`` response
+      status code, ``r`` response body, ``ms`` request duration. Failed
+      requests have ``e`` (exception class and message) instead of ``c`` and ``r``.
+    """
+
+    def __init__(self, filepath: str) -> None:
+        self._file = open(filepath, "w", encoding="utf-8", buffering=1)  # pylint: disable=consider-using-with
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def _write(self, kind: str, device_id: str, **fields) -> None:
+        record = {"t": round(time.monotonic() - self._start, 3), "k": kind, "d": device_id, **fields}
+        line = _compact(record) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+
+    def device(self, device_id: str, title: str, ip: str, port: int) -> None:
+        self._write("device", device_id, title=title, ip=ip, port=port)
+
+    def status(self, device_id: str, status_dict: dict) -> None:
+        self._write("status", device_id, s=status_dict)
+
+    def http(  # pylint: disable=too-many-arguments
+        self, device_id: str, path: str, request_data, response: requests.Response, duration: float
+    ) -> None:
+        self._write(
+            "http",
+            device_id,
+            p=path,
+            q=request_data,
+            c=response.status_code,
+            r=response.text,
+            ms=round(1000 * duration, 1),
+        )
+
+    def http_error(  # pylint: disable=too-many-arguments
+        self, device_id: str, path: str, request_data, error: requests.RequestException, duration: float
+    ) -> None:
+        self._write(
+            "http",
+            device_id,
+            p=path,
+            q=request_data,
+            e=[type(error).__name__, str(error)],
+            ms=round(1000 * duration, 1),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def read_capture(filepath: str):
+    with open(filepath, "r", encoding="utf-8") as capture_file:
+        for line in capture_file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class ReplayHTTP:
+    """Stands in for ``HTTPPool`` during replay and answers with recorded responses.
+
+    Responses are served in recorded order for every receiver address and API
+    path. When the recorded responses run out, the last one is repeated;
+    requests never seen in the capture get an empty ``200`` response.
+    Recorded failures are raised again as ``requests`` exceptions.
+    """
+
+    def __init__(self, records: list, addresses: dict) -> None:
+        self._responses = collections.defaultdict(collections.deque)
+        self._last = {}
+        for record in records:
+            if record["k"] == "http" and record["d"] in addresses:
+                self._responses[(addresses[record["d"]], record["p"])].append(record)
+
+    def post(self, url: str, **_) -> requests.Response:
+        parts = urlsplit(url)
+        key = (parts.netloc, parts.path)
+        responses = self._responses.get(key)
+        record = responses.popleft() if responses else self._last.get(key)
+        self._last[key] = record
+
+        if record and "e" in record:
+            error_name, message = record["e"]
+            raise getattr(requests.exceptions, error_name, requests.RequestException)(message)
+
+        body = (record["r"] if record else "").encode("utf-8")
+        response = requests.Response()
+        response.url = url
+        response.status_code = record["c"] if record else 200
+        response.encoding = "utf-8"
+        response._content = body  # pylint: disable=protected-access
+        return response
+
+    def close(self) -> None:
+        pass
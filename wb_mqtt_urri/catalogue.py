@@ -0,0 +1,129 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _key(name: str) -> str:
+    return name.strip().casefold()
+
+
+class Catalogue:
+    """Presets, user radios and USB folders known to a receiver.
+
+    Lookups are done by name (case-insensitive) in dict indexes, so commands with
+    unknown names are rejected without a request to the receiver. Every index is
+    replaced as a whole when its list is loaded, so readers from MQTT callbacks
+    always see a consistent snapshot.
+    """
+
+    PRESETS_PATH = "/preset/getPresets"
+    USER_RADIOS_PATH = "/radio/getUserRadios"
+    USB_FOLDERS_PATH = "/sources/usb/getFolders"
+    PATHS = (PRESETS_PATH, USER_RADIOS_PATH, USB_FOLDERS_PATH)
+
+    __slots__ = (
+        "_presets",
+        "_preset_names",
+        "_radios",
+        "_radio_names",
+        "_folders",
+        "_loaded",
+    )
+
+    def __init__(self) -> None:
+        self._presets = {}
+        self._preset_names = {}
+        self._radios = {}
+        self._radio_names = {}
+        self._folders = {}
+        self._loaded = set()
+
+    @property
+    def loaded(self) -> bool:
+        return len(self._loaded) == len(self.PATHS)
+
+    def load(self, fetch: callable) -> dict:
+        """Loads all lists, returns errors of the failed ones by their paths.
+
+        Lists are loaded independently: a failed one keeps its previous content,
+        so a missing endpoint doesn't disable lookups in the others.
+        """
+        parsers = {
+            self.PRESETS_PATH: self._set_presets,
+            self.USER_RADIOS_PATH: self._set_radios,
+            self.USB_FOLDERS_PATH: self._set_folders,
+        }
+        failed = {}
+        for path in self.PATHS:
+            try:
+                items = fetch(path)
+                if items is None:
+                    items = []
+                if not isinstance(items, list):
+                    raise TypeError(f"list expected, got {type(items).__name__}")
+                parsers[path](items)
+                self._loaded.add(path)
+            except (OSError, ValueError, TypeError) as e:  # requests exceptions are OSError
+                failed[path] = e
+        logger.debug(
+            "Catalogue loaded: %d presets, %d user radios, %d USB folders",
+            len(self._presets),
+            len(self._radios),
+            len(self._folders),
+        )
+        return failed
+
+    def _set_presets(self, items: list) -> None:
+        presets = {}
+        preset_names = {}
+        for number, preset in enumerate(items):
+            if isinstance(preset, dict):
+                number = preset.get("index", number)
+                preset = preset.get("name", "")
+            if isinstance(preset, str) and preset:
+                presets[_key(preset)] = number
+                preset_names[number] = preset
+        self._presets, self._preset_names = presets, preset_names
+
+    def _set_radios(self, items: list) -> None:
+        radios = {}
+        radio_names = {}
+        for radio in items:
+            if isinstance(radio, dict) and "id" in radio and isinstance(radio.get("name"), str):
+                radios[_key(radio["name"])] = radio["id"]
+                radio_names[radio["id"]] = radio["name"]
+        self._radios, self._radio_names = radios, radio_names
+
+    def _set_folders(self, items: list) -> None:
+        folders = {}
+        for folder in items:
+            if isinstance(folder, dict):
+                folder = folder.get("path", "")
+            if isinstance(folder, str) and folder.strip("/"):
+                folders[_key(folder.strip("/"))] = folder.strip("/")
+        self._folders = folders
+
+    def find_preset(self, name: str):
+        return self._presets.get(_key(name))
+
+    def find_radio(self, name: str):
+        return self._radios.get(_key(name))
+
+    def has_folder(self, path: str) -> bool:
+        """Checks the path, its parent folder or its drive is known, nested folders are not listed"""
+        if self.USB_FOLDERS_PATH not in self._loaded:
+            return True
+        parts = _key(path.strip("/")).split("/")
+        if len(parts) == 1:
+            # a whole drive, e.g. usb1
+            return any(folder.split("/")[0] == parts[0] for folder in self._folders)
+        return any("/".join(parts[:depth]) in self._folders for depth in range(1, len(parts) + 1))
+
+    def is_outdated(self, source: dict) -> bool:
+        """Check if the playing source, as reported in a status message, is missing from the catalogue"""
+        source_type = source.get("sourceType")
+        if source_type == 2 and self.PRESETS_PATH in self._loaded:  # Preset
+            return self._preset_names.get(source.get("index")) != source.get("name")
+        if source_type == 5 and self.USER_RADIOS_PATH in self._loaded:  # User Internet Radio
+            return self._radio_names.get(source.get("id")) != source.get("name")
+        return False
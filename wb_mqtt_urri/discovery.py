@@ -0,0 +1,141 @@
+import asyncio
+import ipaddress
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 9032
+ARP_TABLE_FILEPATH = "/proc/net/arp"
+# a /16 subnet takes about 10 minutes to scan, larger ones are refused
+MIN_PREFIX_LENGTH = 16
+
+
+def read_arp_table(filepath: str = ARP_TABLE_FILEPATH) -> dict:
+    """Returns MAC addresses of resolved neighbours by their IP addresses"""
+    table = {}
+    try:
+        with open(filepath, "r", encoding="utf-8") as arp_file:
+            next(arp_file, None)
+            for line in arp_file:
+                fields = line.split()
+                if len(fields) >= 4 and fields[2] != "0x0" and fields[3] != "00:00:00:00:00:00":
+                    table[fields[0]] = fields[3].lower()
+    except OSError as e:
+        logger.debug("Can't read ARP table %s: %s", filepath, e)
+    return table
+
+
+def subnets_of(addresses, prefix: int = 24) -> list:
+    """Returns subnets around IPv4 addresses, hostnames are skipped"""
+    subnets = []
+    for address in addresses:
+        try:
+            subnet = ipaddress.IPv4Network(f"{address}/{prefix}", strict=False)
+        except ValueError:
+            continue
+        if subnet not in subnets:
+            subnets.append(subnet)
+    return subnets
+
+
+def to_network(subnet) -> ipaddress.IPv4Network:
+    """Parses IPv4 subnet, raises ValueError for invalid subnets and ones larger than /16"""
+    network = ipaddress.IPv4Network(subnet, strict=False)
+    if network.prefixlen < MIN_PREFIX_LENGTH:
+        raise ValueError(f"{network} is too large, prefix length must be at least {MIN_PREFIX_LENGTH}")
+    return network
+
+
+def parse_subnets(subnets) -> list:
+    """Returns IPv4 networks of subnets, invalid subnets are logged and skipped"""
+    networks = []
+    for subnet in subnets:
+        try:
+            networks.append(to_network(subnet))
+        except ValueError as e:
+            logger.error("Invalid subnet %s is skipped: %s", subnet, e)
+    return networks
+
+
+def config_fragment(receivers: list, devices_config: list = ()) -> dict:
+    """Makes ``devices`` config section for found receivers.
+
+    Receivers already present in ``devices_config`` (by MAC or by IP address)
+    keep their id and title.
+    """
+    known_by_mac = {device["urri_mac"].lower(): device for device in devices_config if device.get("urri_mac")}
+    known_by_ip = {device["urri_ip"]: device for device in devices_config}
+    devices = []
+    for receiver in receivers:
+        mac = receiver["urri_mac"]
+        known = known_by_mac.get(mac) or known_by_ip.get(receiver["urri_ip"])
+        if known is not None:
+            device = {"device_id": known["device_id"], "device_title": known["device_title"]}
+        else:
+            suffix = mac.replace(":", "") if mac else receiver["urri_ip"].replace(".", "_")
+            device = {"device_id": f"urri_{suffix}", "device_title": f"URRI {receiver['urri_ip']}"}
+        device.update(urri_ip=receiver["urri_ip"], urri_port=receiver["urri_port"])
+        if mac:
+            device["urri_mac"] = mac
+        devices.append(device)
+    return {"devices": devices}
+
+
+class Discovery:  # pylint: disable=too-few-public-methods
+    """Finds URRI receivers in IPv4 subnets.
+
+    Hosts are probed by a fixed number of workers, so scanning a large subnet
+    neither opens too many sockets nor creates a task per address. A host is
+    taken for a receiver if it answers ``/getPower`` of the receiver API and
+    completes engine.io handshake. MAC addresses are taken from the ARP table,
+    they identify receivers which got a new address from DHCP.
+    """
+
+    IDENTIFY_PATH = "/getPower"
+    HANDSHAKE_PATH = "/socket.io/?EIO=4&transport=polling"
+
+    def __init__(
+        self,
+        port: int = DEFAULT_PORT,
+        max_concurrency: int = 64,
+        timeout: float = 0.5,
+        arp_table_filepath: str = ARP_TABLE_FILEPATH,
+    ) -> None:
+        self._port = port
+        self._max_concurrency = max_concurrency
+        self._timeout = aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
+        self._arp_table_filepath = arp_table_filepath
+
+    async def scan(self, subnets: list) -> list:
+        """Returns found receivers as dicts with ``urri_ip``, ``urri_port`` and ``urri_mac`` keys"""
+        networks = ipaddress.collapse_addresses(to_network(subnet) for subnet in subnets)
+        hosts = (str(host) for network in networks for host in network.hosts())
+        found = []
+        connector = aiohttp.TCPConnector(limit=0, force_close=True)
+        async with aiohttp.ClientSession(connector=connector, timeout=self._timeout) as session:
+
+            async def worker():
+                for host in hosts:
+                    if await self._probe(session, host):
+                        found.append(host)
+
+            await asyncio.gather(*[worker() for _ in range(self._max_concurrency)])
+
+        arp_table = read_arp_table(self._arp_table_filepath)
+        found.sort(key=ipaddress.ip_address)
+        logger.info("Discovery found %d URRI receivers in %s", len(found), ", ".join(map(str, subnets)))
+        return [{"urri_ip": host, "urri_port": self._port, "urri_mac": arp_table.get(host)} for host in found]
+
+    async def _probe(self, session: aiohttp.ClientSession, host: str) -> bool:
+        url = f"http://{host}:{self._port}"
+        try:
+            async with session.post(url + self.IDENTIFY_PATH) as response:
+                if response.status != 200:
+                    return False
+                await response.read()
+            async with session.get(url + self.HANDSHAKE_PATH) as response:
+                return response.status == 200 and (await response.text()).startswith("0{")
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError):
+            return False
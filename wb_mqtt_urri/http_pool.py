@@ -0,0 +1,79 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HTTPPool:
+    """HTTP client shared by all receivers.
+
+    Connections are kept alive and reused per host, the number of requests in
+    flight across all receivers is capped by a semaphore, so fleet-wide
+    operations queue up instead of exhausting sockets.
+
+    Requests block while waiting for a free slot, so they must not be sent
+    from the event loop thread.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        max_concurrency: int = 8,
+        connections_per_host: int = 2,
+        max_hosts: int = 64,
+        connect_timeout: float = 2.0,
+        read_timeout: float = 3.0,
+    ) -> None:
+        self._adapter = HTTPAdapter(
+            pool_connections=max_hosts, pool_maxsize=connections_per_host, pool_block=True, max_retries=0
+        )
+        self._session = requests.Session()
+        self._session.mount("http://", self._adapter)
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._timeout = (connect_timeout, read_timeout)
+        self._errors = 0
+        # requests are sent from many executor and MQTT threads
+        self._errors_lock = threading.Lock()
+
+    @property
+    def timeout(self) -> tuple:
+        return self._timeout
+
+    def post(self, url: str, bounded: bool = True, **kwargs) -> requests.Response:
+        """Sends POST request.
+
+        ``bounded=False`` skips the concurrency cap, it is meant for latency
+        critical fan-outs which already limit the number of requests themselves.
+        """
+        kwargs.setdefault("timeout", self._timeout)
+        if not bounded:
+            return self._post(url, **kwargs)
+        with self._semaphore:
+            return self._post(url, **kwargs)
+
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        try:
+            return self._session.post(url, **kwargs)
+        except requests.RequestException:
+            with self._errors_lock:
+                self._errors += 1
+            raise
+
+    def stats(self) -> dict:
+        requests_count = 0
+        connections_count = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                requests_count += pool.num_requests
+                connections_count += pool.num_connections
+        reuse = 100 * (requests_count - connections_count) / requests_count if requests_count else 0
+        return {
+            "requests": requests_count,
+            "connections": connections_count,
+            "reuse": round(max(reuse, 0), 1),
+            "errors": self._errors,
+        }
+
+    def close(self) -> None:
+        self._session.close()
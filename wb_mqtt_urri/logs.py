@@ -0,0 +1,97 @@
+import logging
+import time
+
+status_logger = logging.getLogger("wb_mqtt_urri.status")
+command_logger = logging.getLogger("wb_mqtt_urri.command")
+mqtt_logger = logging.getLogger("wb_mqtt_urri.mqtt")
+
+SUBSYSTEM_LOGGERS = (status_logger, command_logger, mqtt_logger)
+
+TEXT_FORMAT = "%(levelname)s: %(message)s"
+
+
+class SamplingFilter(logging.Filter):  # pylint: disable=too-few-public-methods
+    """Passes at most one record per ``interval`` seconds for each ``sample_key``.
+
+    Records without ``sample_key`` in ``extra`` are always passed. The number of
+    dropped records is attached to the next passed one as ``suppressed``.
+    """
+
+    def __init__(self, interval: float = 10.0) -> None:
+        super().__init__()
+        self._interval = interval
+        self._last_times = {}
+        self._suppressed = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        last_time = self._last_times.get(key)
+        if last_time is not None and now - last_time < self._interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+        self._last_times[key] = now
+        record.suppressed = self._suppressed.pop(key, 0)
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as logfmt ``key=value`` lines"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = [
+            ("level", record.levelname.lower()),
+            ("subsystem", record.name.rsplit(".", 1)[-1]),
+            ("device", getattr(record, "device", None)),
+            ("msg", record.getMessage()),
+            ("suppressed", getattr(record, "suppressed", 0) or None),
+        ]
+        line = " ".join(f"{key}={self._quote(value)}" for key, value in fields if value is not None)
+        if record.exc_info:
+            line += " exc=" + self._quote(self.formatException(record.exc_info))
+        return line
+
+    @staticmethod
+    def _quote(value) -> str:
+        value = str(value)
+        if not value or any(char in value for char in ' ="\n'):
+            return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        return value
+
+
+class DeviceLogger(logging.LoggerAdapter):
+    """Adds device id to records and enables debug level only for devices with debug switched on"""
+
+    def __init__(self, logger: logging.Logger, device_id: str, debug: bool = False) -> None:
+        super().__init__(logger, {"device": device_id})
+        self.debug_enabled = debug
+
+    def isEnabledFor(self, level: int) -> bool:
+        if level < logging.INFO and not self.debug_enabled:
+            return False
+        return self.logger.isEnabledFor(level)
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+
+def setup_logging(structured: bool = False, debug: bool = False, sampling_interval: float = 10.0) -> None:
+    """Configures subsystem loggers.
+
+    ``debug`` should be set if any device has debug switched on: subsystem loggers
+    pass debug records then, and ``DeviceLogger`` filters them per device.
+    """
+    root_logger = logging.getLogger()
+    formatter = StructuredFormatter() if structured else logging.Formatter(TEXT_FORMAT)
+    for handler in root_logger.handlers:
+        handler.setFormatter(formatter)
+
+    sampling_filter = SamplingFilter(sampling_interval)
+    for subsystem_logger in SUBSYSTEM_LOGGERS:
+        subsystem_logger.setLevel(logging.DEBUG if debug else logging.INFO)
+        for old_filter in [f for f in subsystem_logger.filters if isinstance(f, SamplingFilter)]:
+            subsystem_logger.removeFilter(old_filter)
+        subsystem_logger.addFilter(sampling_filter)
@@ -5,6 +5,7 @@ import logging
 import os
 import signal
 import sys
+import time
 from threading import Lock
 
 import jsonschema
@@ -12,230 +13,39 @@ import requests
 import socketio
 from wb_common.mqtt_client import DEFAULT_BROKER_URL, MQTTClient
 
-from wb_mqtt_urri import wbmqtt
+from wb_mqtt_urri import logs
+from wb_mqtt_urri.broadcast import BroadcastDevice
+from wb_mqtt_urri.capture import Recorder, ReplayHTTP, read_capture
+from wb_mqtt_urri.catalogue import Catalogue
+from wb_mqtt_urri.discovery import (
+    Discovery,
+    config_fragment,
+    parse_subnets,
+    read_arp_table,
+    subnets_of,
+)
+from wb_mqtt_urri.http_pool import HTTPPool
+from wb_mqtt_urri.logs import DeviceLogger, command_logger, status_logger
+from wb_mqtt_urri.mqtt_device import MQTTDevice
+from wb_mqtt_urri.mqtt_device import logger as mqtt_device_logger
+from wb_mqtt_urri.mqtt_device import to_mqtt_value
+from wb_mqtt_urri.profiler import register_task, track_background_tasks
+from wb_mqtt_urri.state_cache import StateCache
+from wb_mqtt_urri.stats import StatsDevice
+from wb_mqtt_urri.transport import SharedTransport
+from wb_mqtt_urri.watchdog import Liveness
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logging.basicConfig(level=logging.INFO, format=logs.TEXT_FORMAT)
 logger.setLevel(logging.INFO)
 
 
 CONFIG_FILEPATH = "/etc/wb-mqtt-urri.conf"
 SCHEMA_FILEPATH = "/usr/share/wb-mqtt-confed/schemas/wb-mqtt-urri.schema.json"
+STATE_FILEPATH = "/var/lib/wb-mqtt-urri/state.json"
 
 
-class MQTTDevice:
-    def __init__(self, mqtt_client: MQTTClient):
-        self._client = mqtt_client
-        self._device = None
-        self._urri_device = None
-        self._root_topic = None
-        logger.debug("MQTT device created")
-
-    def set_urri_device(self, urri_device):
-        self._urri_device = urri_device
-        self._root_topic = "/devices/" + self._urri_device.id
-        logger.debug("Set URRI device %s on %s topic", self._urri_device.title, self._root_topic)
-
-    def publicate(self):
-        self._create_controls()
-        self._subscribe_on_topics()
-
-    def _create_controls(self):
-        self._device = wbmqtt.Device(
-            mqtt_client=self._client,
-            device_mqtt_name=self._urri_device.id,
-            device_title=self._urri_device.title,
-            driver_name="wb-mqtt-urri",
-        )
-        self._device.create_control(
-            "Power", wbmqtt.ControlMeta(title="Power", control_type="switch", order=1, read_only=False), "0"
-        )
-        self._device.create_control(
-            "Volume",
-            wbmqtt.ControlMeta(title="Volume", control_type="range", order=2, read_only=False, max_value=100),
-            0,
-        )
-        self._device.create_control(
-            "Playback",
-            wbmqtt.ControlMeta(title="Playback", control_type="switch", order=3, read_only=False),
-            "0",
-        )
-        self._device.create_control(
-            "Mute",
-            wbmqtt.ControlMeta(title="Mute", control_type="switch", order=4, read_only=False),
-            "0",
-        )
-        self._device.create_control(
-            "AUX",
-            wbmqtt.ControlMeta(title="AUX", control_type="switch", order=5, read_only=False),
-            "0",
-        )
-        self._device.create_control(
-            "Next",
-            wbmqtt.ControlMeta(title="Next", control_type="pushbutton", order=6, read_only=False),
-            "",
-        )
-        self._device.create_control(
-            "Previous",
-            wbmqtt.ControlMeta(title="Previous", control_type="pushbutton", order=7, read_only=False),
-            "",
-        )
-        self._device.create_control(
-            "Source Type",
-            wbmqtt.ControlMeta(title="Source Type", control_type="text", order=8, read_only=True),
-            "",
-        )
-        self._device.create_control(
-            "Radio ID",
-            wbmqtt.ControlMeta(title="Radio ID", control_type="value", order=9, read_only=False),
-            0,
-        )
-        self._device.create_control(
-            "Preset ID",
-            wbmqtt.ControlMeta(
-                title="Preset ID", control_type="value", min_value=0, max_value=3, order=10, read_only=False
-            ),
-            0,
-        )
-        self._device.create_control(
-            "Source Name",
-            wbmqtt.ControlMeta(title="Source Name", control_type="text", order=11, read_only=True),
-            "",
-        )
-        self._device.create_control(
-            "Song Title",
-            wbmqtt.ControlMeta(title="Song Title", control_type="text", order=12, read_only=True),
-            "",
-        )
-        self._device.create_control(
-            "IP address",
-            wbmqtt.ControlMeta(title="IP address", control_type="text", order=13, read_only=True),
-            self._urri_device.ip,
-        )
-        self._device.create_control(
-            "Play Folder",
-            wbmqtt.ControlMeta(title="Play Folder", control_type="text", order=14, read_only=False),
-            "",
-        )
-        self._device.create_control(
-            "Play Alert",
-            wbmqtt.ControlMeta(title="Play Alert", control_type="text", order=15, read_only=False),
-            "",
-        )
-        logger.info("%s device created", self._root_topic)
-
-    def _subscribe_on_topics(self):
-        self._device.add_control_message_callback("Power", self._on_message_power)
-        self._device.add_control_message_callback("Volume", self._on_message_volume)
-        self._device.add_control_message_callback("Playback", self._on_message_playback)
-        self._device.add_control_message_callback("Mute", self._on_message_mute)
-        self._device.add_control_message_callback("AUX", self._on_message_aux)
-        self._device.add_control_message_callback("Next", self._on_message_next_track)
-        self._device.add_control_message_callback("Previous", self._on_message_previous_track)
-        self._device.add_control_message_callback("Radio ID", self._on_message_radioid)
-        self._device.add_control_message_callback("Preset ID", self._on_message_presetid)
-        self._device.add_control_message_callback("Play Folder", self._on_message_play_folder)
-        self._device.add_control_message_callback("Play Alert", self._on_message_play_alert)
-
-    def update(self, control_name, value):
-        self._device.set_control_value(control_name, value)
-        logger.debug("%s %s control updated with value %s", self._urri_device.id, control_name, value)
-
-    def set_readonly(self, control_name, value):
-        self._device.set_control_read_only(control_name, value)
-        logger.debug("%s %s control readonly set to %s", self._urri_device.id, control_name, value)
-
-    def set_error_state(self, error: bool):
-        for control_name in self._device.get_controls_list():
-            if control_name != "IP address":
-                self._device.set_control_error(control_name, "r" if error else "")
-
-    def republish(self):
-        self._device.republish_device()
-        self._subscribe_on_topics()
-
-    def remove(self):
-        self._device.remove_device()
-        logger.info("%s device deleted", self._root_topic)
-
-    def _on_message_power(self, _, __, msg):
-        new_powerstate = "1" in str(msg.payload)
-        self._urri_device.set_power(new_powerstate)
-        current_powerstate = self._urri_device.get_power()
-
-        if new_powerstate != current_powerstate:
-            logger.warning(
-                "URRI %s power state not changed! Current state: %s",
-                self._urri_device.title,
-                current_powerstate,
-            )
-        else:
-            logger.info(
-                "URRI %s power state changed to %s",
-                self._urri_device.title,
-                current_powerstate,
-            )
-
-    def _on_message_playback(self, _, __, msg):
-        value = "1" in str(msg.payload)
-        self._urri_device.set_playback(value)
-        logger.info("Set playback %s on URRI %s", value, self._urri_device.title)
-
-    def _on_message_mute(self, _, __, msg):
-        value = "1" in str(msg.payload)
-        self._urri_device.set_mute(value)
-        logger.info("Set mute %s on URRI %s", value, self._urri_device.title)
-
-    def _on_message_aux(self, _, __, msg):
-        value = "1" in str(msg.payload)
-        self._urri_device.set_aux(value)
-        logger.info("Set AUX %s on URRI %s", value, self._urri_device.title)
-
-    def _on_message_volume(self, _, __, msg):
-        volume = int(str(msg.payload.decode("utf-8")))
-        self._urri_device.set_volume(volume)
-        logger.info("Set volume %s on URRI %s", volume, self._urri_device.title)
-
-    def _on_message_radioid(self, _, __, msg):
-        radioid = int(str(msg.payload.decode("utf-8")))
-        result = self._urri_device.play_radio_by_id(radioid)
-        self._device.set_control_error("Radio ID", "" if result else "w")
-        if result:
-            logger.info("Set radio ID %s on URRI %s", radioid, self._urri_device.title)
-        else:
-            logger.warning("Radio ID %s not found on URRI %s", radioid, self._urri_device.title)
-
-    def _on_message_presetid(self, _, __, msg):
-        presetid = int(str(msg.payload.decode("utf-8")))
-        self._urri_device.play_preset_by_number(presetid)
-        logger.info("Set preset ID %s on URRI %s", presetid, self._urri_device.title)
-
-    def _on_message_next_track(self, _, __, ___):
-        self._urri_device.play_next_track()
-        logger.info("Play next track on URRI %s", self._urri_device.title)
-
-    def _on_message_previous_track(self, _, __, ___):
-        self._urri_device.play_previous_track()
-        logger.info("Play previous track on URRI %s", self._urri_device.title)
-
-    def _on_message_play_folder(self, _, __, msg):
-        folder = msg.payload.decode("utf-8")
-        result = self._urri_device.play_usb_folder(folder)
-        self._device.set_control_error("Play Folder", "" if result else "w")
-        if result:
-            logger.info("Play USB folder %s on URRI %s", folder, self._urri_device.title)
-
-    def _on_message_play_alert(self, _, __, msg):
-        alert = msg.payload.decode("utf-8")
-        result = self._urri_device.play_alert_by_name(alert)
-        self._device.set_control_error("Play Alert", "" if result else "w")
-        if result:
-            logger.info("Alert %s played on URRI %s", alert, self._urri_device.title)
-        else:
-            logger.warning("Alert %s not found on URRI %s", alert, self._urri_device.title)
-
-
-class URRIDevice:
+class URRIDevice:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
     SOURCE_TYPES = {
         0: "Internet Radio",
         1: "File System",
@@ -245,19 +55,72 @@ class URRIDevice:
         5: "User Internet Radio",
         6: "Spotify",
     }
+    CATALOGUE_REFRESH_INTERVAL = 30
+    CATALOGUE_RETRY_DELAY = 5
+    CATALOGUE_RETRY_MAX_DELAY = 300
+    WATCHDOG_INTERVAL = 10
+    RTT_PROBE_INTERVAL = 30
+    DISCONNECT_TIMEOUT = 5
+
+    # Many receivers are served by one process, so per-device state is kept in slots
+    __slots__ = (
+        "_id",
+        "_title",
+        "_ip",
+        "_port",
+        "_mac",
+        "_url",
+        "_transport",
+        "_urri_client",
+        "_mqtt_device",
+        "_http",
+        "_state_cache",
+        "_properties",
+        "_debug",
+        "_status_log",
+        "_command_log",
+        "_catalogue",
+        "_catalogue_task",
+        "_catalogue_refresh_time",
+        "_liveness",
+        "_recorder",
+    )
 
-    def __init__(self, properties):
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        properties,
+        state_cache: StateCache = None,
+        http_pool: HTTPPool = None,
+        watchdog_timeout: float = 60,
+        recorder: Recorder = None,
+        transport: SharedTransport = None,
+    ):
         self._id = properties["device_id"]
         self._title = properties["device_title"]
         self._ip = properties["urri_ip"]
-        self._url = f"http://{properties['urri_ip']}:{properties['urri_port']}"
-        self._urri_client = socketio.AsyncClient(logger=False, engineio_logger=False)
+        self._port = properties["urri_port"]
+        self._mac = properties.get("urri_mac", "").lower() or None
+        self._url = f"http://{self._ip}:{self._port}"
+        self._transport = transport
+        self._urri_client = None
         self._mqtt_device = None
-        self._properties = {}
-
-        self._init_callbacks()
-
-        logger.debug("Add device with id " + self._id + " and title " + self._title)
+        self._http = http_pool or HTTPPool()
+        self._state_cache = state_cache
+        self._properties = state_cache.get(self._id) if state_cache else {}
+        self._debug = properties.get("debug", False)
+        self._status_log = DeviceLogger(status_logger, self._id, self._debug)
+        self._command_log = DeviceLogger(command_logger, self._id, self._debug)
+        self._catalogue = Catalogue()
+        self._catalogue_task = None
+        self._catalogue_refresh_time = None
+        self._liveness = Liveness(watchdog_timeout)
+        self._recorder = recorder
+        if recorder is not None:
+            recorder.device(self._id, self._title, self._ip, properties["urri_port"])
+
+        self._create_client()
+
+        logger.debug("Add device with id %s and title %s", self._id, self._title)
 
     @property
     def id(self):  # pylint: disable=invalid-name
@@ -271,6 +134,26 @@ class URRIDevice:
     def ip(self):
         return self._ip
 
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def mac(self):
+        return self._mac
+
+    @property
+    def connected(self):
+        return self._urri_client.connected
+
+    @property
+    def properties(self):
+        return self._properties
+
+    @property
+    def debug(self):
+        return self._debug
+
     def set_mqtt_device(self, mqtt_device: MQTTDevice):
         self._mqtt_device = mqtt_device
         logger.debug("Set MQTT device for URRI %s", self._id)
@@ -280,75 +163,204 @@ class URRIDevice:
             while True:
                 try:
                     await self._urri_client.connect(self._url)
-                    await self._urri_client.wait()
+                    await self._wait_alive()
                 except socketio.exceptions.ConnectionError as e:
                     self._mqtt_device.set_error_state(True)
+                    self._publish_diagnostics()
                     logger.error("URRI %s connection error: %s", self._id, e)
                     await asyncio.sleep(5)
+                except ValueError as e:
+                    # engine.io refuses to connect until the previous session is closed
+                    logger.error("URRI %s client is stuck: %s, recreating", self._id, e)
+                    await self._replace_client()
         except asyncio.CancelledError:
             logger.debug("URRI device %s run task cancelled", self._id)
 
     async def stop(self):
         await self._urri_client.disconnect()
 
+    def set_address(self, ip: str, port: int):
+        logger.info("URRI %s moved from %s:%s to %s:%s", self._id, self._ip, self._port, ip, port)
+        self._ip = ip
+        self._port = port
+        self._url = f"http://{ip}:{port}"
+        self._mqtt_device.update("IP address", ip)
+        # socket.io client retries the last connected URL by itself, run() connects to _url
+        self._urri_client.connection_url = self._url
+
+    async def _wait_alive(self):
+        wait_task = asyncio.create_task(self._urri_client.wait(), name=f"{self._id}-wait")
+        watchdog_task = asyncio.create_task(self._watchdog(), name=f"{self._id}-watchdog")
+        register_task(wait_task, self._id)
+        register_task(watchdog_task, self._id)
+        try:
+            done, _ = await asyncio.wait((wait_task, watchdog_task), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # wait_task is not cancelled here: it awaits engine.io read loop task, which would be
+            # cancelled too
+            watchdog_task.cancel()
+
+        if watchdog_task not in done or not watchdog_task.result():
+            return
+
+        self._mqtt_device.set_error_state(True)
+        status_age = self._liveness.status_age()
+        logger.error(
+            "URRI %s session is silent for %.0f s (last status %s s ago), reconnecting",
+            self._id,
+            self._liveness.age(),
+            round(status_age) if status_age is not None else None,
+        )
+        try:
+            await asyncio.wait_for(self._urri_client.eio.disconnect(abort=True), self.DISCONNECT_TIMEOUT)
+            await asyncio.wait_for(asyncio.shield(wait_task), self.DISCONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            # a half-open socket can outlast the close, engine.io is left in "disconnecting" state then
+            logger.warning("URRI %s session close timed out, recreating client", self._id)
+            await self._replace_client(wait_task)
+
+    def _create_client(self):
+        client_options = {"http_session": self._transport.session()} if self._transport is not None else {}
+        self._urri_client = socketio.AsyncClient(logger=False, engineio_logger=False, **client_options)
+        track_background_tasks(self._urri_client.eio, self._id)
+        self._liveness.attach(self._urri_client.eio)
+        self._init_callbacks()
+
+    async def _replace_client(self, wait_task: asyncio.Task = None):
+        eio = self._urri_client.eio
+        tasks = [task for task in (wait_task, eio.read_loop_task, eio.write_loop_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.DISCONNECT_TIMEOUT)
+        if eio.external_http:
+            # engine.io closes its session when garbage collected, the shared one must stay open
+            eio.http = None
+        self._create_client()
+
+    # returns True when the session has to be reconnected
+    async def _watchdog(self):
+        while True:
+            await asyncio.sleep(self.WATCHDOG_INTERVAL)
+            if self._liveness.is_stale():
+                return True
+
+            rtt_age = self._liveness.rtt_age()
+            if rtt_age is None or rtt_age > self.RTT_PROBE_INTERVAL:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self.get_power)
+                except requests.RequestException as e:
+                    self._command_log.warning("URRI %s API probe failed: %s", self._id, e)
+
+            self._publish_diagnostics()
+
+    def _publish_diagnostics(self):
+        age = self._liveness.age()
+        if age is not None:
+            self._mqtt_device.update("Last Seen", round(age))
+        if self._liveness.rtt is not None:
+            self._mqtt_device.update("RTT", round(1000 * self._liveness.rtt, 1))
+
+    def _post(self, path: str, data: dict = None, bounded: bool = True):
+        kwargs = {}
+        if data is not None:
+            kwargs = {"headers": {"Content-Type": "application/json"}, "data": json.dumps(data)}
+        start = time.monotonic()
+        try:
+            response = self._http.post(url=self._url + path, bounded=bounded, **kwargs)
+        except requests.RequestException as e:
+            if self._recorder is not None:
+                self._recorder.http_error(self._id, path, data, e, time.monotonic() - start)
+            raise
+        if self._recorder is not None:
+            self._recorder.http(self._id, path, data, response, time.monotonic() - start)
+        return response
+
     def get_power(self):
-        response = requests.post(url=(self._url + "/getPower"), timeout=3)
+        start = time.monotonic()
+        response = self._post("/getPower")
+        self._liveness.record_rtt(time.monotonic() - start)
         return "1" in str(response.content)
 
     def set_power(self, power: bool):
         out_url = "/wakeUp" if power else "/standby"
-        requests.post(url=(self._url + out_url), timeout=3)
+        self._post(out_url)
 
     def set_playback(self, play: bool):
         out_url = "/play" if play else "/stop"
-        requests.post(url=(self._url + out_url), timeout=3)
+        self._post(out_url)
 
     def set_mute(self, mute: bool):
         out_url = "/mute" if mute else "/unmute"
-        requests.post(url=(self._url + out_url), timeout=3)
+        self._post(out_url)
 
     def set_aux(self, aux: bool):
         out_url = "/enableAUX" if aux else "/disableAUX"
-        requests.post(url=(self._url + out_url), timeout=3)
+        self._post(out_url)
 
     def set_volume(self, volume: int):
         if 0 <= volume <= 100:
-            requests.post(url=f"{self._url}/setVolume/{volume}", timeout=3)
+            self._post(f"/setVolume/{volume}")
 
     def play_radio_by_id(self, radioid: int):
-        out_headers = {"Content-Type": "application/json"}
-        out_data = {"id": radioid}
-        response = requests.post(
-            headers=out_headers, url=f"{self._url}/radio", data=json.dumps(out_data), timeout=3
-        )
-        logger.debug("Play radio by id response: %s %s", self._id, response.json())
-        return response.json()["success"]
+        response = self._post("/radio", {"id": radioid})
+        result = response.json()
+        self._command_log.debug("Play radio by id response: %s %s", self._id, result)
+        return result["success"]
+
+    def play_radio_by_name(self, radio_name: str):
+        radioid = self._catalogue.find_radio(radio_name)
+        if radioid is None:
+            self._command_log.warning("Radio %s not found on URRI %s", radio_name, self._id)
+            return False
+        return self.play_radio_by_id(radioid)
 
     def play_preset_by_number(self, preset_number: int):
-        response = requests.post(url=f"{self._url}/preset/{preset_number}/play", timeout=3)
-        logger.debug("Play preset by number response: %s %s", self._id, response.json())
+        response = self._post(f"/preset/{preset_number}/play")
+        if self._command_log.isEnabledFor(logging.DEBUG):
+            self._command_log.debug("Play preset by number response: %s %s", self._id, response.json())
+
+    def play_preset_by_name(self, preset_name: str):
+        preset_number = self._catalogue.find_preset(preset_name)
+        if preset_number is None:
+            self._command_log.warning("Preset %s not found on URRI %s", preset_name, self._id)
+            return False
+        self.play_preset_by_number(preset_number)
+        return True
 
     def get_alert_files(self):
-        response = requests.post(url=f"{self._url}/alert/getSongs", timeout=3)
-        logger.debug("Get alert files response: %s %s", self._id, response.json())
-        return response.json()
+        response = self._post("/alert/getSongs")
+        alerts = response.json()
+        self._command_log.debug("Get alert files response: %s %s", self._id, alerts)
+        if not isinstance(alerts, list):
+            self._command_log.warning("Wrong alert files response from URRI %s: %s", self._id, alerts)
+            return []
+        return alerts
+
+    def find_alert(self, alert_name: str):
+        # indexes shift when files are added or removed, so the list is fetched on every call
+        alert_name = alert_name.removeprefix("/")
+        alerts = self.get_alert_files()
+        if alert_name not in alerts:
+            self._command_log.debug("Alert %s %s not found", self._id, alert_name)
+            return None
+        return alerts.index(alert_name)
 
-    def play_alert_by_name(self, alert_name: str):
+    def play_alert(self, alert_id: int, bounded: bool = True):
+        response = self._post("/alert/notify", {"fileIndex": alert_id}, bounded=bounded)
         try:
-            alert_name = alert_name.removeprefix("/")
-            alerts = self.get_alert_files()
-            alert_id = alerts.index(alert_name)
-
-            out_headers = {"Content-Type": "application/json"}
-            out_data = {"fileIndex": alert_id}
-            response = requests.post(
-                headers=out_headers, url=f"{self._url}/alert/notify", data=json.dumps(out_data), timeout=3
-            )
-            logger.debug("Play alert by name response: %s %s", self._id, response.json())
-            return response.json()["success"]
+            result = response.json()
         except ValueError:
-            logger.debug("Alert %s %s not found", self._id, alert_name)
+            self._command_log.warning("Wrong play alert response from URRI %s: %s", self._id, response.text)
+            return False
+        self._command_log.debug("Play alert response: %s %s", self._id, result)
+        return result["success"]
+
+    def play_alert_by_name(self, alert_name: str):
+        alert_id = self.find_alert(alert_name)
+        if alert_id is None:
             return False
+        return self.play_alert(alert_id)
 
     def play_usb_folder(self, path: str):
         _, path_and_file = os.path.splitdrive(path)
@@ -359,120 +371,193 @@ class URRIDevice:
         path, file = os.path.split(path_and_file)
 
         if not path.startswith("usb"):
-            logger.warning("Play folder on URRI %s failed! Path %s is not USB", self._id, path)
+            self._command_log.warning("Play folder on URRI %s failed! Path %s is not USB", self._id, path)
             return False
 
         if file != "":
-            logger.warning("Play folder on URRI %s failed! File %s is not a folder", self._id, file)
+            self._command_log.warning(
+                "Play folder on URRI %s failed! File %s is not a folder", self._id, file
+            )
             return False
 
-        out_headers = {"Content-Type": "application/json"}
-        out_data = {"path": path}
-        response = requests.post(
-            headers=out_headers,
-            url=(self._url + "/sources/usb/play"),
-            data=json.dumps(out_data),
-            timeout=3,
-        )
-        logger.debug("Play USB folder response: %s %s", self._id, response.json())
-        return response.json()["success"]
+        if not self._catalogue.has_folder(path):
+            self._command_log.warning("Play folder on URRI %s failed! Folder %s not found", self._id, path)
+            return False
+
+        response = self._post("/sources/usb/play", {"path": path})
+        result = response.json()
+        self._command_log.debug("Play USB folder response: %s %s", self._id, result)
+        return result["success"]
 
     def play_next_track(self):
-        response = requests.post(url=f"{self._url}/next", timeout=3)
-        logger.debug("Play next track response: %s", response.json())
+        response = self._post("/next")
+        if self._command_log.isEnabledFor(logging.DEBUG):
+            self._command_log.debug("Play next track response: %s", response.json())
 
     def play_previous_track(self):
-        requests.post(url=(self._url + "/previous"), timeout=3)
+        self._post("/previous")
+
+    def _fetch_catalogue_part(self, path: str):
+        response = self._post(path)
+        response.raise_for_status()
+        return response.json()
+
+    async def _load_catalogue(self):
+        retry_delay = self.CATALOGUE_RETRY_DELAY
+        while True:
+            failed = await asyncio.get_running_loop().run_in_executor(
+                None, self._catalogue.load, self._fetch_catalogue_part
+            )
+            for path, e in failed.items():
+                logger.warning("Can't load %s of URRI %s: %s", path, self._id, e)
+            # the catalogue is loaded again on connection
+            if not failed or not self._urri_client.connected:
+                return
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(2 * retry_delay, self.CATALOGUE_RETRY_MAX_DELAY)
+
+    def _refresh_catalogue(self):
+        if self._catalogue_task is not None and not self._catalogue_task.done():
+            return
+        now = time.monotonic()
+        if (
+            self._catalogue_refresh_time is not None
+            and now - self._catalogue_refresh_time < self.CATALOGUE_REFRESH_INTERVAL
+        ):
+            return
+        self._catalogue_refresh_time = now
+        self._catalogue_task = asyncio.create_task(self._load_catalogue())
+        register_task(self._catalogue_task, self._id)
 
     def _init_callbacks(self):
         @self._urri_client.event
         async def connect():
             logger.info("Connected to URRI %s", self._url)
+            self._liveness.touch()
+            self._mqtt_device.set_error_state(False)
+            if self._mac is None:
+                self._mac = read_arp_table().get(self._ip)
+            if not self._catalogue.loaded:
+                self._refresh_catalogue()
+
+        self._urri_client.on("status", self.on_status_message)
+
+    def _update_source_properties(self, source: dict, properties: dict, readonly_properties: dict):
+        type_id = source["sourceType"]
+        sourcetype = self.SOURCE_TYPES.get(type_id, "Unknown")
+        properties["Source Type"] = sourcetype
+        properties["Set Source"] = type_id
+
+        if sourcetype in ["Internet Radio", "Preset", "User Internet Radio", "Spotify"]:
+            properties["Source Name"] = source["name"]
+        elif sourcetype == "File System":
+            properties["Source Name"] = source["path"]
+        else:
+            properties["Source Name"] = ""
+
+        if sourcetype in ["Internet Radio", "User Internet Radio"]:
+            properties["Radio ID"] = source["id"]
+        elif sourcetype == "Preset":
+            properties["Radio ID"] = source["id"]
+            properties["Preset ID"] = source["index"]
+
+        if sourcetype in ["File System", "Preset"]:
+            readonly_properties.update({"Next": False, "Previous": False})
+        elif sourcetype == "Spotify":
+            can_do_next = source.get("nextButton", False)
+            can_do_prev = source.get("prevButton", False)
+            readonly_properties.update({"Next": not can_do_next, "Previous": not can_do_prev})
+        else:
+            readonly_properties.update({"Next": True, "Previous": True})
+
+    async def on_status_message(self, status_dict):
+        self._liveness.touch_status()
+        if self._recorder is not None:
+            self._recorder.status(self._id, status_dict)
+        self._status_log.debug(
+            "URRI status message received: %s", status_dict, extra={"sample_key": ("status", self._id)}
+        )
 
-        @self._urri_client.on("status")
-        async def on_status_message(status_dict):  # pylint: disable=too-many-branches
-            logger.debug("URRI status message received: %s", status_dict)
-
-            properties = {}
-            readonly_properties = {
-                "Next": False,
-                "Previous": False,
-            }
-
-            # get status by request
-            properties["Power"] = self.get_power()
-
-            # playback status
-            if "playback" in status_dict:
-                properties["Playback"] = status_dict["playback"] == "play"
-
-            # AUX status
-            if "AUX" in status_dict:
-                properties["AUX"] = status_dict["AUX"]
-
-            # muted status
-            if "muted" in status_dict:
-                properties["Mute"] = status_dict["muted"]
-
-            # volume
-            if "volume" in status_dict:
-                properties["Volume"] = status_dict["volume"]
-
-            # source type, name, id
-            if "source" in status_dict:
-                type_id = status_dict["source"]["sourceType"]
-                sourcetype = self.SOURCE_TYPES.get(type_id, "Unknown")
-                properties["Source Type"] = sourcetype
-                properties["Set Source"] = type_id
-
-                if sourcetype in ["Internet Radio", "Preset", "User Internet Radio", "Spotify"]:
-                    properties["Source Name"] = status_dict["source"]["name"]
-                elif sourcetype == "File System":
-                    properties["Source Name"] = status_dict["source"]["path"]
-                else:
-                    properties["Source Name"] = ""
-
-                if sourcetype in ["Internet Radio", "User Internet Radio"]:
-                    properties["Radio ID"] = status_dict["source"]["id"]
-                elif sourcetype == "Preset":
-                    properties["Radio ID"] = status_dict["source"]["id"]
-                    properties["Preset ID"] = status_dict["source"]["index"]
-
-                if sourcetype in ["File System", "Preset"]:
-                    readonly_properties.update({"Next": False, "Previous": False})
-                elif sourcetype == "Spotify":
-                    can_do_next = status_dict["source"].get("nextButton", False)
-                    can_do_prev = status_dict["source"].get("prevButton", False)
-                    readonly_properties.update({"Next": not can_do_next, "Previous": not can_do_prev})
-                else:
-                    readonly_properties.update({"Next": True, "Previous": True})
-
-            # song title
-            properties["Song Title"] = status_dict.get("songTitle", "No Title")
-
-            # aux
-            if properties.get("AUX", False):
-                properties.update({"Source Type": "AUX", "Source Name": "AUX", "Song Title": ""})
-                readonly_properties.update({"Next": True, "Previous": True})
-
-            self._properties.update(properties)
-
-            for key, value in properties.items():
-                if isinstance(value, bool):
-                    value = "1" if value else "0"
-                self._mqtt_device.update(key, value)
-
-            for key, value in readonly_properties.items():
-                self._mqtt_device.set_readonly(key, value)
-
-
-class URRIClient:  # pylint: disable=too-few-public-methods
-    def __init__(self, devices_config) -> None:
+        properties = {}
+        readonly_properties = {
+            "Next": False,
+            "Previous": False,
+        }
+
+        # get status by request, HTTP pool may block waiting for a free slot, so not on the event loop
+        properties["Power"] = await asyncio.get_running_loop().run_in_executor(None, self.get_power)
+
+        # playback status
+        if "playback" in status_dict:
+            properties["Playback"] = status_dict["playback"] == "play"
+
+        # AUX status
+        if "AUX" in status_dict:
+            properties["AUX"] = status_dict["AUX"]
+
+        # muted status
+        if "muted" in status_dict:
+            properties["Mute"] = status_dict["muted"]
+
+        # volume
+        if "volume" in status_dict:
+            properties["Volume"] = status_dict["volume"]
+
+        # source type, name, id
+        if "source" in status_dict:
+            if self._catalogue.is_outdated(status_dict["source"]):
+                self._refresh_catalogue()
+            self._update_source_properties(status_dict["source"], properties, readonly_properties)
+
+        # song title
+        properties["Song Title"] = status_dict.get("songTitle", "No Title")
+
+        # aux
+        if properties.get("AUX", False):
+            properties.update({"Source Type": "AUX", "Source Name": "AUX", "Song Title": ""})
+            readonly_properties.update({"Next": True, "Previous": True})
+
+        self._properties.update(properties)
+        if self._state_cache:
+            self._state_cache.update(self._id, properties)
+
+        for key, value in properties.items():
+            self._mqtt_device.update(key, to_mqtt_value(value))
+
+        for key, value in readonly_properties.items():
+            self._mqtt_device.set_readonly(key, value)
+
+
+class URRIClient:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    DISCOVERY_MAX_INTERVAL = 3600
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        devices_config,
+        state_filepath: str = STATE_FILEPATH,
+        http_config: dict = None,
+        watchdog_timeout: float = 60,
+        recorder: Recorder = None,
+        discovery_interval: float = 0,
+        discovery_subnets: list = None,
+    ) -> None:
         self._devices_config = devices_config
+        self._watchdog_timeout = watchdog_timeout
+        self._recorder = recorder
+        self._discovery_interval = discovery_interval
+        if discovery_subnets:
+            self._discovery_subnets = parse_subnets(discovery_subnets)
+        else:
+            self._discovery_subnets = subnets_of(device_config["urri_ip"] for device_config in devices_config)
+        self._state_cache = StateCache(state_filepath)
+        self._http_pool = HTTPPool(max_hosts=max(len(devices_config), 1), **(http_config or {}))
+        self._transport = SharedTransport()
         self._mqtt_was_disconected = False
         self._urri_devices = []
         self._mqtt_devices = []
         self._mqtt_client = None
+        self._stats_device = None
+        self._broadcast_device = None
         self._lock = Lock()
 
     async def _exit_gracefully(self):
@@ -490,6 +575,10 @@ class URRIClient:  # pylint: disable=too-few-public-methods
             with self._lock:
                 for mqtt_device in self._mqtt_devices:
                     mqtt_device.republish()
+                if self._stats_device is not None:
+                    self._stats_device.republish()
+                if self._broadcast_device is not None:
+                    self._broadcast_device.republish()
 
         logger.info("MQTT client connected")
 
@@ -497,11 +586,78 @@ class URRIClient:  # pylint: disable=too-few-public-methods
         self._mqtt_was_disconected = True
         logger.info("MQTT client disconnected")
 
+    # unreachable receivers could get a new address from DHCP, the interval doubles while they are not found
+    async def _follow_moved_devices(self):
+        discovery = Discovery()
+        interval = self._discovery_interval
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                found = await self._find_moved_devices(discovery)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Looking for moved URRI receivers failed")
+                found = False
+            interval = self._discovery_interval if found else min(2 * interval, self.DISCOVERY_MAX_INTERVAL)
+
+    async def _find_moved_devices(self, discovery: Discovery) -> bool:
+        lost = [device for device in self._urri_devices if not device.connected and device.mac]
+        if not lost:
+            return True
+        receivers = {
+            receiver["urri_mac"]: receiver for receiver in await discovery.scan(self._discovery_subnets)
+        }
+        for device in lost:
+            receiver = receivers.get(device.mac)
+            if receiver is None:
+                continue
+            address = (receiver["urri_ip"], receiver["urri_port"])
+            if address != (device.ip, device.port):
+                device.set_address(*address)
+        return all(device.mac in receivers for device in lost)
+
     def _on_term_signal(self):
         asyncio.create_task(self._exit_gracefully())
         logger.info("SIGTERM or SIGINT received, exiting")
 
+    def _create_devices(self):
+        for device_config in self._devices_config:
+            urri_device = URRIDevice(
+                device_config,
+                self._state_cache,
+                self._http_pool,
+                watchdog_timeout=self._watchdog_timeout,
+                recorder=self._recorder,
+                transport=self._transport,
+            )
+            mqtt_device = MQTTDevice(self._mqtt_client)
+
+            with self._lock:
+                self._urri_devices.append(urri_device)
+                self._mqtt_devices.append(mqtt_device)
+
+            mqtt_device.set_urri_device(urri_device)
+            urri_device.set_mqtt_device(mqtt_device)
+            mqtt_device.publicate()
+
+    async def _release(self):
+        await asyncio.gather(*[urri_device.stop() for urri_device in self._urri_devices])
+        await self._transport.close()
+        self._state_cache.flush()
+        self._http_pool.close()
+        if self._recorder is not None:
+            self._recorder.close()
+        for mqtt_device in self._mqtt_devices:
+            mqtt_device.remove()
+        if self._stats_device is not None:
+            self._stats_device.remove()
+        if self._broadcast_device is not None:
+            self._broadcast_device.remove()
+        self._mqtt_client.stop()
+        logger.debug("MQTT client stopped")
+
     async def run(self):
+        stats_task = None
+        discovery_task = None
         try:
             event_loop = asyncio.get_event_loop()
 
@@ -516,19 +672,28 @@ class URRIClient:  # pylint: disable=too-few-public-methods
 
             logger.debug("MQTT client started")
 
-            for device_config in self._devices_config:
-                urri_device = URRIDevice(device_config)
-                mqtt_device = MQTTDevice(self._mqtt_client)
+            self._state_cache.load()
 
-                with self._lock:
-                    self._urri_devices.append(urri_device)
-                    self._mqtt_devices.append(mqtt_device)
+            self._create_devices()
 
-                mqtt_device.set_urri_device(urri_device)
-                urri_device.set_mqtt_device(mqtt_device)
-                mqtt_device.publicate()
+            self._stats_device = StatsDevice(self._mqtt_client, event_loop, self._http_pool)
+            self._stats_device.publicate()
+            stats_task = asyncio.create_task(self._stats_device.run(), name="stats-run")
+            register_task(stats_task, StatsDevice.DEVICE_ID)
 
-            await asyncio.gather(*[urri_device.run() for urri_device in self._urri_devices])
+            self._broadcast_device = BroadcastDevice(self._mqtt_client, event_loop, self._urri_devices)
+            self._broadcast_device.publicate()
+
+            if self._discovery_interval and self._discovery_subnets:
+                discovery_task = asyncio.create_task(self._follow_moved_devices(), name="discovery")
+                register_task(discovery_task, "discovery")
+
+            tasks = []
+            for urri_device in self._urri_devices:
+                task = asyncio.create_task(urri_device.run(), name=f"{urri_device.id}-run")
+                register_task(task, urri_device.id)
+                tasks.append(task)
+            await asyncio.gather(*tasks)
 
         except (ConnectionError, ConnectionRefusedError) as e:
             logger.error("MQTT error connection to broker %s: %s", DEFAULT_BROKER_URL, e)
@@ -539,11 +704,111 @@ class URRIClient:  # pylint: disable=too-few-public-methods
             # systemd status=1/FAILURE when MQTT broker disconnects client
             return 0
         finally:
-            await asyncio.gather(*[urri_device.stop() for urri_device in self._urri_devices])
-            for mqtt_device in self._mqtt_devices:
-                mqtt_device.remove()
-            self._mqtt_client.stop()
-            logger.debug("MQTT client stopped")
+            if stats_task is not None:
+                stats_task.cancel()
+            if discovery_task is not None:
+                discovery_task.cancel()
+            await self._release()
+
+
+def _create_replay_devices(
+    device_records: list, mqtt_client: MQTTClient, http: ReplayHTTP, device_prefix: str
+):
+    urri_devices = {}
+    mqtt_devices = []
+    for record in device_records:
+        urri_device = URRIDevice(
+            {
+                "device_id": device_prefix + record["d"],
+                "device_title": record["title"],
+                "urri_ip": record["ip"],
+                "urri_port": record["port"],
+            },
+            http_pool=http,
+        )
+        mqtt_device = MQTTDevice(mqtt_client)
+        mqtt_device.set_urri_device(urri_device)
+        urri_device.set_mqtt_device(mqtt_device)
+        mqtt_device.publicate()
+        urri_devices[record["d"]] = urri_device
+        mqtt_devices.append(mqtt_device)
+    return urri_devices, mqtt_devices
+
+
+async def _feed_status_events(events: list, urri_devices: dict, speed: float) -> float:
+    handling_time = 0
+    start = time.monotonic()
+    for record in events:
+        if speed > 0:
+            delay = (record["t"] - events[0]["t"]) / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        event_start = time.perf_counter()
+        await urri_devices[record["d"]].on_status_message(record["s"])
+        handling_time += time.perf_counter() - event_start
+    return handling_time
+
+
+async def replay(
+    capture_filepath: str, mqtt_client: MQTTClient, speed: float = 1.0, device_prefix: str = "replay-"
+) -> dict:
+    records = list(read_capture(capture_filepath))
+    device_records = [record for record in records if record["k"] == "device"]
+    http = ReplayHTTP(records, {record["d"]: f"{record['ip']}:{record['port']}" for record in device_records})
+
+    urri_devices, mqtt_devices = _create_replay_devices(device_records, mqtt_client, http, device_prefix)
+
+    events = [record for record in records if record["k"] == "status" and record["d"] in urri_devices]
+    start = time.monotonic()
+    try:
+        handling_time = await _feed_status_events(events, urri_devices, speed)
+    finally:
+        for mqtt_device in mqtt_devices:
+            mqtt_device.remove()
+
+    elapsed = time.monotonic() - start
+    return {
+        "devices": len(urri_devices),
+        "events": len(events),
+        "elapsed_s": round(elapsed, 3),
+        "events_per_s": round(len(events) / elapsed, 1) if elapsed else None,
+        "mean_handling_ms": round(1000 * handling_time / len(events), 3) if events else None,
+    }
+
+
+def run_replay(capture_filepath: str, speed: float) -> int:
+    mqtt_client = MQTTClient("wb-mqtt-urri-replay", DEFAULT_BROKER_URL)
+    try:
+        mqtt_client.start()
+        result = asyncio.run(replay(capture_filepath, mqtt_client, speed))
+    except (ConnectionError, ConnectionRefusedError) as e:
+        logger.error("MQTT error connection to broker %s: %s", DEFAULT_BROKER_URL, e)
+        return 1
+    finally:
+        mqtt_client.stop()
+    json.dump(result, sys.stdout, indent=2)
+    return 0
+
+
+def run_discovery(subnets: list, config_filepath: str) -> int:
+    try:
+        devices_config = to_json(config_filepath)["devices"]
+    except (OSError, ValueError, KeyError):
+        devices_config = []
+    try:
+        receivers = asyncio.run(Discovery().scan(subnets))
+    except ValueError as e:
+        logger.error("Invalid subnet: %s", e)
+        return 2
+    json.dump(config_fragment(receivers, devices_config), sys.stdout, sort_keys=True, indent=2)
+    return 0
+
+
+def migrate_debug_option(config: dict) -> dict:
+    debug = config.pop("debug", False)
+    for device in config.get("devices", []):
+        device.setdefault("debug", debug)
+    return config
 
 
 def read_and_validate_config(config_filepath: str, schema_filepath: str) -> dict:
@@ -562,6 +827,8 @@ def read_and_validate_config(config_filepath: str, schema_filepath: str) -> dict
                     device[field] = config.pop(field, None)
                 config.update({"devices": [device]})
 
+            migrate_debug_option(config)
+
             id_list = [device["device_id"] for device in config["devices"]]
             if len(id_list) != len(set(id_list)):
                 raise ValueError("Device ID's must be unique")
@@ -586,9 +853,9 @@ def to_json(config_filepath: str) -> dict:
             device["device_title"] = config.pop("device_title", "Network Receiver URRI")
             device["urri_ip"] = config.pop("urri_ip", "")
             device["urri_port"] = config.pop("urri_port", 9032)
-            config.update({"devices": [device], "debug": config.pop("debug", False)})
+            config.update({"devices": [device]})
 
-        return config
+        return migrate_debug_option(config)
 
 
 def main(argv):
@@ -601,6 +868,21 @@ def main(argv):
         help="Make JSON for wb-mqtt-confed from /etc/wb-mqtt-urri.conf",
     )
     parser.add_argument("-c", "--config", type=str, default=CONFIG_FILEPATH, help="Config file")
+    parser.add_argument("--capture", type=str, metavar="FILE", help="Record receivers traffic to FILE")
+    parser.add_argument("--replay", type=str, metavar="FILE", help="Replay traffic captured in FILE and exit")
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="Replay speed factor, 0 to replay as fast as possible",
+    )
+    parser.add_argument(
+        "--discover",
+        type=str,
+        nargs="+",
+        metavar="SUBNET",
+        help="Find receivers in SUBNET (e.g. 192.168.1.0/24, at most /16), print devices config and exit",
+    )
     args = parser.parse_args(argv[1:])
 
     if args.j:
@@ -608,14 +890,34 @@ def main(argv):
         json.dump(config, sys.stdout, sort_keys=True, indent=2)
         return 0
 
+    if args.discover:
+        return run_discovery(args.discover, args.config)
+
+    if args.replay:
+        return run_replay(args.replay, args.replay_speed)
+
     config = read_and_validate_config(args.config, SCHEMA_FILEPATH)
     if config is None:
         return 6  # systemd status=6/NOTCONFIGURED
-    if config["debug"]:
-        logging.basicConfig(level=logging.DEBUG)
+    debug = any(device["debug"] for device in config["devices"])
+    logs.setup_logging(structured=config.get("structured_logging", False), debug=debug)
+    if debug:
         logger.setLevel(logging.DEBUG)
+        mqtt_device_logger.setLevel(logging.DEBUG)
 
-    urri_client = URRIClient(config["devices"])
+    http_config = {
+        "connect_timeout": config.get("http_connect_timeout", 2),
+        "read_timeout": config.get("http_read_timeout", 3),
+        "max_concurrency": config.get("http_max_concurrency", 8),
+    }
+    urri_client = URRIClient(
+        config["devices"],
+        http_config=http_config,
+        watchdog_timeout=config.get("watchdog_timeout", 60),
+        recorder=Recorder(args.capture) if args.capture else None,
+        discovery_interval=config.get("discovery_interval", 60),
+        discovery_subnets=config.get("discovery_subnets"),
+    )
     result = asyncio.run(urri_client.run())
 
     logger.info("URRI service stopped")
@@ -0,0 +1,278 @@
+import logging
+
+from wb_common.mqtt_client import MQTTClient
+
+from wb_mqtt_urri import wbmqtt
+from wb_mqtt_urri.logs import DeviceLogger, command_logger, mqtt_logger
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def to_mqtt_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return value
+
+
+class MQTTDevice:
+    # controls which stay valid while the receiver is unreachable
+    DIAGNOSTIC_CONTROLS = ("IP address", "Last Seen")
+
+    __slots__ = ("_client", "_device", "_urri_device", "_root_topic", "_command_log", "_mqtt_log")
+
+    def __init__(self, mqtt_client: MQTTClient):
+        self._client = mqtt_client
+        self._device = None
+        self._urri_device = None
+        self._root_topic = None
+        self._command_log = None
+        self._mqtt_log = None
+        logger.debug("MQTT device created")
+
+    def set_urri_device(self, urri_device):
+        self._urri_device = urri_device
+        self._root_topic = "/devices/" + self._urri_device.id
+        self._command_log = DeviceLogger(command_logger, self._urri_device.id, self._urri_device.debug)
+        self._mqtt_log = DeviceLogger(mqtt_logger, self._urri_device.id, self._urri_device.debug)
+        logger.debug("Set URRI device %s on %s topic", self._urri_device.title, self._root_topic)
+
+    def publicate(self):
+        self._create_controls()
+        self._subscribe_on_topics()
+
+    def _create_controls(self):
+        self._device = wbmqtt.Device(
+            mqtt_client=self._client,
+            device_mqtt_name=self._urri_device.id,
+            device_title=self._urri_device.title,
+            driver_name="wb-mqtt-urri",
+            log=self._mqtt_log,
+        )
+        self._device.create_control(
+            "Power",
+            wbmqtt.ControlMeta(title="Power", control_type="switch", order=1, read_only=False),
+            self._initial_value("Power", "0"),
+        )
+        self._device.create_control(
+            "Volume",
+            wbmqtt.ControlMeta(title="Volume", control_type="range", order=2, read_only=False, max_value=100),
+            self._initial_value("Volume", 0),
+        )
+        self._device.create_control(
+            "Playback",
+            wbmqtt.ControlMeta(title="Playback", control_type="switch", order=3, read_only=False),
+            self._initial_value("Playback", "0"),
+        )
+        self._device.create_control(
+            "Mute",
+            wbmqtt.ControlMeta(title="Mute", control_type="switch", order=4, read_only=False),
+            self._initial_value("Mute", "0"),
+        )
+        self._device.create_control(
+            "AUX",
+            wbmqtt.ControlMeta(title="AUX", control_type="switch", order=5, read_only=False),
+            self._initial_value("AUX", "0"),
+        )
+        self._device.create_control(
+            "Next",
+            wbmqtt.ControlMeta(title="Next", control_type="pushbutton", order=6, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Previous",
+            wbmqtt.ControlMeta(title="Previous", control_type="pushbutton", order=7, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Source Type",
+            wbmqtt.ControlMeta(title="Source Type", control_type="text", order=8, read_only=True),
+            self._initial_value("Source Type", ""),
+        )
+        self._device.create_control(
+            "Radio ID",
+            wbmqtt.ControlMeta(title="Radio ID", control_type="value", order=9, read_only=False),
+            self._initial_value("Radio ID", 0),
+        )
+        self._device.create_control(
+            "Preset ID",
+            wbmqtt.ControlMeta(
+                title="Preset ID", control_type="value", min_value=0, max_value=3, order=10, read_only=False
+            ),
+            self._initial_value("Preset ID", 0),
+        )
+        self._device.create_control(
+            "Source Name",
+            wbmqtt.ControlMeta(title="Source Name", control_type="text", order=11, read_only=True),
+            self._initial_value("Source Name", ""),
+        )
+        self._device.create_control(
+            "Song Title",
+            wbmqtt.ControlMeta(title="Song Title", control_type="text", order=12, read_only=True),
+            self._initial_value("Song Title", ""),
+        )
+        self._device.create_control(
+            "IP address",
+            wbmqtt.ControlMeta(title="IP address", control_type="text", order=13, read_only=True),
+            self._urri_device.ip,
+        )
+        self._device.create_control(
+            "Play Folder",
+            wbmqtt.ControlMeta(title="Play Folder", control_type="text", order=14, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Play Alert",
+            wbmqtt.ControlMeta(title="Play Alert", control_type="text", order=15, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Play Radio",
+            wbmqtt.ControlMeta(title="Play Radio", control_type="text", order=16, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Play Preset",
+            wbmqtt.ControlMeta(title="Play Preset", control_type="text", order=17, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Last Seen",
+            wbmqtt.ControlMeta(title="Last Seen, s", control_type="value", order=18, read_only=True),
+            0,
+        )
+        self._device.create_control(
+            "RTT",
+            wbmqtt.ControlMeta(title="RTT, ms", control_type="value", order=19, read_only=True),
+            0,
+        )
+        logger.info("%s device created", self._root_topic)
+
+    def _initial_value(self, control_name, default):
+        return to_mqtt_value(self._urri_device.properties.get(control_name, default))
+
+    def _subscribe_on_topics(self):
+        self._device.add_control_message_callback("Power", self._on_message_power)
+        self._device.add_control_message_callback("Volume", self._on_message_volume)
+        self._device.add_control_message_callback("Playback", self._on_message_playback)
+        self._device.add_control_message_callback("Mute", self._on_message_mute)
+        self._device.add_control_message_callback("AUX", self._on_message_aux)
+        self._device.add_control_message_callback("Next", self._on_message_next_track)
+        self._device.add_control_message_callback("Previous", self._on_message_previous_track)
+        self._device.add_control_message_callback("Radio ID", self._on_message_radioid)
+        self._device.add_control_message_callback("Preset ID", self._on_message_presetid)
+        self._device.add_control_message_callback("Play Folder", self._on_message_play_folder)
+        self._device.add_control_message_callback("Play Alert", self._on_message_play_alert)
+        self._device.add_control_message_callback("Play Radio", self._on_message_play_radio)
+        self._device.add_control_message_callback("Play Preset", self._on_message_play_preset)
+
+    def update(self, control_name, value):
+        self._device.set_control_value(control_name, value)
+        self._mqtt_log.debug("%s %s control updated with value %s", self._urri_device.id, control_name, value)
+
+    def set_readonly(self, control_name, value):
+        self._device.set_control_read_only(control_name, value)
+        self._mqtt_log.debug("%s %s control readonly set to %s", self._urri_device.id, control_name, value)
+
+    def set_error_state(self, error: bool):
+        for control_name in self._device.get_controls_list():
+            if control_name not in self.DIAGNOSTIC_CONTROLS:
+                self._device.set_control_error(control_name, "r" if error else "")
+
+    def republish(self):
+        self._device.republish_device()
+        self._subscribe_on_topics()
+
+    def remove(self):
+        self._device.remove_device()
+        logger.info("%s device deleted", self._root_topic)
+
+    def _on_message_power(self, _, __, msg):
+        new_powerstate = "1" in str(msg.payload)
+        self._urri_device.set_power(new_powerstate)
+        current_powerstate = self._urri_device.get_power()
+
+        if new_powerstate != current_powerstate:
+            self._command_log.warning(
+                "URRI %s power state not changed! Current state: %s",
+                self._urri_device.title,
+                current_powerstate,
+            )
+        else:
+            self._command_log.debug(
+                "URRI %s power state changed to %s",
+                self._urri_device.title,
+                current_powerstate,
+            )
+
+    def _on_message_playback(self, _, __, msg):
+        value = "1" in str(msg.payload)
+        self._urri_device.set_playback(value)
+        self._command_log.debug("Set playback %s on URRI %s", value, self._urri_device.title)
+
+    def _on_message_mute(self, _, __, msg):
+        value = "1" in str(msg.payload)
+        self._urri_device.set_mute(value)
+        self._command_log.debug("Set mute %s on URRI %s", value, self._urri_device.title)
+
+    def _on_message_aux(self, _, __, msg):
+        value = "1" in str(msg.payload)
+        self._urri_device.set_aux(value)
+        self._command_log.debug("Set AUX %s on URRI %s", value, self._urri_device.title)
+
+    def _on_message_volume(self, _, __, msg):
+        volume = int(str(msg.payload.decode("utf-8")))
+        self._urri_device.set_volume(volume)
+        self._command_log.debug("Set volume %s on URRI %s", volume, self._urri_device.title)
+
+    def _on_message_radioid(self, _, __, msg):
+        radioid = int(str(msg.payload.decode("utf-8")))
+        result = self._urri_device.play_radio_by_id(radioid)
+        self._device.set_control_error("Radio ID", "" if result else "w")
+        if result:
+            self._command_log.debug("Set radio ID %s on URRI %s", radioid, self._urri_device.title)
+        else:
+            self._command_log.warning("Radio ID %s not found on URRI %s", radioid, self._urri_device.title)
+
+    def _on_message_presetid(self, _, __, msg):
+        presetid = int(str(msg.payload.decode("utf-8")))
+        self._urri_device.play_preset_by_number(presetid)
+        self._command_log.debug("Set preset ID %s on URRI %s", presetid, self._urri_device.title)
+
+    def _on_message_next_track(self, _, __, ___):
+        self._urri_device.play_next_track()
+        self._command_log.debug("Play next track on URRI %s", self._urri_device.title)
+
+    def _on_message_previous_track(self, _, __, ___):
+        self._urri_device.play_previous_track()
+        self._command_log.debug("Play previous track on URRI %s", self._urri_device.title)
+
+    def _on_message_play_folder(self, _, __, msg):
+        folder = msg.payload.decode("utf-8")
+        result = self._urri_device.play_usb_folder(folder)
+        self._device.set_control_error("Play Folder", "" if result else "w")
+        if result:
+            self._command_log.debug("Play USB folder %s on URRI %s", folder, self._urri_device.title)
+
+    def _on_message_play_alert(self, _, __, msg):
+        alert = msg.payload.decode("utf-8")
+        result = self._urri_device.play_alert_by_name(alert)
+        self._device.set_control_error("Play Alert", "" if result else "w")
+        if result:
+            self._command_log.debug("Alert %s played on URRI %s", alert, self._urri_device.title)
+        else:
+            self._command_log.warning("Alert %s not found on URRI %s", alert, self._urri_device.title)
+
+    def _on_message_play_radio(self, _, __, msg):
+        radio = msg.payload.decode("utf-8")
+        result = self._urri_device.play_radio_by_name(radio)
+        self._device.set_control_error("Play Radio", "" if result else "w")
+        if result:
+            self._command_log.debug("Radio %s played on URRI %s", radio, self._urri_device.title)
+
+    def _on_message_play_preset(self, _, __, msg):
+        preset = msg.payload.decode("utf-8")
+        result = self._urri_device.play_preset_by_name(preset)
+        self._device.set_control_error("Play Preset", "" if result else "w")
+        if result:
+            self._command_log.debug("Preset %s played on URRI %s", preset, self._urri_device.title)
@@ -0,0 +1,122 @@
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import weakref
+
+_tasks_info = weakref.WeakKeyDictionary()
+
+
+def register_task(task: asyncio.Future, owner: str) -> None:
+    _tasks_info[task] = (owner, time.monotonic())
+
+
+def track_background_tasks(eio_client, owner: str) -> None:
+    """Registers tasks started by an engine.io client, so they can be attributed to their device"""
+    original = eio_client.start_background_task
+
+    def start_background_task(target, *args, **kwargs):
+        task = original(target, *args, **kwargs)
+        register_task(task, owner)
+        return task
+
+    eio_client.start_background_task = start_background_task
+
+
+def dump_tasks() -> dict:
+    """Pending asyncio tasks of the running loop grouped by owner, with their age in seconds"""
+    now = time.monotonic()
+    tasks = {}
+    for task in asyncio.all_tasks():
+        owner, created = _tasks_info.get(task, ("other", None))
+        coro = task.get_coro()
+        tasks.setdefault(owner, []).append(
+            {
+                "name": task.get_name(),
+                "coro": getattr(coro, "__qualname__", repr(coro)),
+                "age": round(now - created, 1) if created is not None else None,
+            }
+        )
+    for owner_tasks in tasks.values():
+        owner_tasks.sort(key=lambda task: -(task["age"] or 0))
+    return tasks
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical profiler for all threads of the process.
+
+    A background thread takes stacks of all other threads every ``interval``
+    seconds, so the asyncio loop and paho network thread are profiled together
+    without slowing them down like a tracing profiler would.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self._interval = interval
+        self._stacks = collections.Counter()
+        self._samples = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def samples(self) -> int:
+        return self._samples
+
+    def start(self) -> None:
+        self._stacks.clear()
+        self._samples = 0
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="wb-mqtt-urri-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self._interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                self._stacks[tuple(reversed(stack))] += 1
+            self._samples += 1
+
+    def write_collapsed(self, filepath: str) -> None:
+        """Writes stacks in collapsed format, suitable for flamegraph tools"""
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with open(filepath, "w", encoding="utf-8") as profile_file:
+            for stack, count in self._stacks.most_common():
+                profile_file.write(f"{';'.join(stack)} {count}\n")
+
+    def top_functions(self, count: int = 10) -> list:
+        """Functions with the most samples on top of the stack (self time), with inclusive share"""
+        own = collections.Counter()
+        inclusive = collections.Counter()
+        for stack, samples in self._stacks.items():
+            own[stack[-1]] += samples
+            for function in set(stack[1:]):
+                inclusive[function] += samples
+        total = sum(self._stacks.values()) or 1
+        return [
+            {
+                "function": function,
+                "self": round(100 * samples / total, 1),
+                "total": round(100 * inclusive[function] / total, 1),
+            }
+            for function, samples in own.most_common(count)
+        ]
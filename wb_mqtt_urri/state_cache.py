@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class StateCache:
+    """Last known receiver properties, persisted between driver restarts.
+
+    Writes are debounced: every update only marks the cache dirty and the file
+    is rewritten once per ``flush_delay`` seconds at most, in an executor thread
+    because fsync may take long on SD cards. The file is replaced atomically,
+    so a crash or power loss never leaves a truncated state file.
+    """
+
+    def __init__(self, filepath: str, flush_delay: float = 5.0) -> None:
+        self._filepath = filepath
+        self._flush_delay = flush_delay
+        self._states = {}
+        self._flush_handle = None
+        # _version counts changes, _written_version is the last one saved to the file
+        self._version = 0
+        self._written_version = 0
+        self._write_lock = threading.Lock()
+
+    def load(self) -> None:
+        try:
+            with open(self._filepath, "r", encoding="utf-8") as state_file:
+                states = json.load(state_file)
+            if not isinstance(states, dict):
+                raise ValueError("state file root must be an object")
+            self._states = {
+                device_id: properties
+                for device_id, properties in states.items()
+                if isinstance(properties, dict)
+            }
+            logger.debug("Loaded state of %d devices from %s", len(self._states), self._filepath)
+        except FileNotFoundError:
+            self._states = {}
+        except (OSError, ValueError) as e:
+            logger.warning("Can't load state file %s: %s", self._filepath, e)
+            self._states = {}
+
+    def get(self, device_id: str) -> dict:
+        return dict(self._states.get(device_id, {}))
+
+    def update(self, device_id: str, properties: dict) -> None:
+        state = self._states.setdefault(device_id, {})
+        changed = {key: value for key, value in properties.items() if state.get(key) != value}
+        if not changed:
+            return
+        state.update(changed)
+        self._version += 1
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self._flush_delay, self._flush_in_executor, loop)
+
+    def _flush_in_executor(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._flush_handle = None
+        loop.run_in_executor(None, self._write, self._version, json.dumps(self._states, sort_keys=True))
+
+    def flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._version > self._written_version:
+            self._write(self._version, json.dumps(self._states, sort_keys=True))
+
+    def _write(self, version: int, data: str) -> None:
+        directory = os.path.dirname(self._filepath) or "."
+        with self._write_lock:
+            # flush() on shutdown may have saved a newer state already
+            if version <= self._written_version:
+                return
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix=".state-", dir=directory)
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+                        tmp_file.write(data)
+                        tmp_file.flush()
+                        os.fsync(tmp_file.fileno())
+                    os.replace(tmp_path, self._filepath)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                self._written_version = version
+                logger.debug("State of %d devices saved to %s", len(self._states), self._filepath)
+            except OSError as e:
+                logger.warning("Can't save state file %s: %s", self._filepath, e)
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+
+from wb_common.mqtt_client import MQTTClient
+
+from wb_mqtt_urri import wbmqtt
+from wb_mqtt_urri.http_pool import HTTPPool
+from wb_mqtt_urri.profiler import SamplingProfiler, dump_tasks
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILEPATH = "/var/lib/wb-mqtt-urri/profile.collapsed"
+
+
+class StatsDevice(wbmqtt.ServiceDevice):
+    DEVICE_ID = "wb-mqtt-urri-stats"
+    DEVICE_TITLE = "URRI driver statistics"
+    DEFAULT_PROFILE_DURATION = 10
+    UPDATE_INTERVAL = 10
+    TOP_FUNCTIONS_COUNT = 10
+
+    def __init__(
+        self,
+        mqtt_client: MQTTClient,
+        event_loop,
+        http_pool: HTTPPool,
+        profile_filepath: str = PROFILE_FILEPATH,
+    ):
+        super().__init__(mqtt_client)
+        self._event_loop = event_loop
+        self._http = http_pool
+        self._profile_filepath = profile_filepath
+        self._profile_future = None
+
+    def _create_controls(self):
+        self._device.create_control(
+            "Profile",
+            wbmqtt.ControlMeta(title="Profile", control_type="pushbutton", order=1, read_only=False),
+            "",
+        )
+        self._device.create_control(
+            "Profile Duration",
+            wbmqtt.ControlMeta(
+                title="Profile Duration, s",
+                control_type="value",
+                min_value=1,
+                max_value=300,
+                order=2,
+                read_only=False,
+            ),
+            self.DEFAULT_PROFILE_DURATION,
+        )
+        self._device.create_control(
+            "Profile Summary",
+            wbmqtt.ControlMeta(title="Profile Summary", control_type="text", order=3, read_only=True),
+            "",
+        )
+        self._device.create_control(
+            "Tasks",
+            wbmqtt.ControlMeta(title="Tasks", control_type="text", order=4, read_only=True),
+            "",
+        )
+        self._device.create_control(
+            "HTTP Requests",
+            wbmqtt.ControlMeta(title="HTTP Requests", control_type="value", order=5, read_only=True),
+            0,
+        )
+        self._device.create_control(
+            "HTTP Connections",
+            wbmqtt.ControlMeta(title="HTTP Connections", control_type="value", order=6, read_only=True),
+            0,
+        )
+        self._device.create_control(
+            "HTTP Connection Reuse",
+            wbmqtt.ControlMeta(
+                title="HTTP Connection Reuse, %", control_type="value", order=7, read_only=True, max_value=100
+            ),
+            0,
+        )
+        self._device.create_control(
+            "HTTP Errors",
+            wbmqtt.ControlMeta(title="HTTP Errors", control_type="value", order=8, read_only=True),
+            0,
+        )
+
+    def _subscribe_on_topics(self):
+        self._device.add_control_message_callback("Profile", self._on_message_profile)
+        self._device.add_control_message_callback("Profile Duration", self._on_message_profile_duration)
+
+    async def run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.UPDATE_INTERVAL)
+                self.update_http_stats()
+        except asyncio.CancelledError:
+            logger.debug("Statistics update task cancelled")
+
+    def update_http_stats(self):
+        stats = self._http.stats()
+        self._device.set_control_value("HTTP Requests", stats["requests"])
+        self._device.set_control_value("HTTP Connections", stats["connections"])
+        self._device.set_control_value("HTTP Connection Reuse", stats["reuse"])
+        self._device.set_control_value("HTTP Errors", stats["errors"])
+
+    def _on_message_profile_duration(self, _, __, msg):
+        try:
+            duration = int(float(msg.payload.decode("utf-8")))
+        except ValueError:
+            logger.warning("Wrong profile duration %s", msg.payload)
+            return
+        self._device.set_control_value("Profile Duration", max(1, min(duration, 300)))
+
+    def _on_message_profile(self, _, __, ___):
+        if self._profile_future is not None and not self._profile_future.done():
+            logger.warning("Profiling is already running")
+            return
+        duration = int(self._device.get_control_value("Profile Duration") or self.DEFAULT_PROFILE_DURATION)
+        self._profile_future = asyncio.run_coroutine_threadsafe(self._profile(duration), self._event_loop)
+
+    async def _profile(self, duration: int):
+        logger.info("Profiling started for %s s", duration)
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.stop()
+
+        tasks = dump_tasks()
+        summary = {
+            "file": self._profile_filepath,
+            "samples": profiler.samples,
+            "top": profiler.top_functions(self.TOP_FUNCTIONS_COUNT),
+        }
+        try:
+            await self._event_loop.run_in_executor(None, profiler.write_collapsed, self._profile_filepath)
+        except OSError as e:
+            logger.warning("Can't write profile to %s: %s", self._profile_filepath, e)
+            summary["file"] = None
+
+        self._device.set_control_value("Profile Summary", json.dumps(summary))
+        self._device.set_control_value("Tasks", json.dumps(tasks))
+        logger.info("Profiling finished, %d samples collected", profiler.samples)
@@ -0,0 +1,27 @@
+import aiohttp
+
+
+class SharedTransport:
+    """One aiohttp session for socket.io connections of all receivers.
+
+    By default every socket.io client creates its own ``aiohttp.ClientSession``
+    with a connector, DNS cache and timers. With a shared session these are
+    created once, and each receiver only holds its websocket.
+
+    Clients using the shared session must live as long as the session: engine.io
+    client closes its session when garbage collected.
+    """
+
+    def __init__(self) -> None:
+        self._session = None
+
+    def session(self) -> aiohttp.ClientSession:
+        """Returns the shared session, it must be called from the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=0, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
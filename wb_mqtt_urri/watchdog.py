@@ -0,0 +1,59 @@
+import time
+
+
+class Liveness:
+    """Tracks activity of a receiver session.
+
+    Any engine.io packet (status events and server pings alike) counts as
+    activity, so a quiet but healthy session is not taken for a dead one.
+    Round-trip time is measured on receiver API requests: engine.io 4 pings
+    are sent by the server, so the client can't time them.
+    """
+
+    __slots__ = ("timeout", "rtt", "_last_activity", "_last_status", "_rtt_time")
+
+    def __init__(self, timeout: float) -> None:
+        self.timeout = timeout
+        self.rtt = None
+        self._last_activity = None
+        self._last_status = None
+        self._rtt_time = None
+
+    def attach(self, eio_client) -> None:
+        receive_packet = eio_client._receive_packet  # pylint: disable=protected-access
+
+        async def _receive_packet(pkt):
+            self.touch()
+            await receive_packet(pkt)
+
+        eio_client._receive_packet = _receive_packet  # pylint: disable=protected-access
+
+    def touch(self) -> None:
+        self._last_activity = time.monotonic()
+
+    def touch_status(self) -> None:
+        self._last_status = self._last_activity = time.monotonic()
+
+    def age(self):
+        """Seconds since the last activity, None if the session never was alive"""
+        if self._last_activity is None:
+            return None
+        return time.monotonic() - self._last_activity
+
+    def status_age(self):
+        if self._last_status is None:
+            return None
+        return time.monotonic() - self._last_status
+
+    def is_stale(self) -> bool:
+        age = self.age()
+        return age is not None and age > self.timeout
+
+    def record_rtt(self, seconds: float) -> None:
+        self.rtt = seconds
+        self._rtt_time = time.monotonic()
+
+    def rtt_age(self):
+        if self._rtt_time is None:
+            return None
+        return time.monotonic() - self._rtt_time
@@ -1,3 +1,4 @@
+import abc
 import json
 import logging
 import random
@@ -5,6 +6,8 @@ import threading
 
 from wb_common.mqtt_client import MQTTClient
 
+logger = logging.getLogger("wb_mqtt_urri.mqtt")
+
 
 class ControlMeta:  # pylint: disable=too-few-public-methods,disable=too-many-arguments
     def __init__(
@@ -35,10 +38,16 @@ class ControlState:  # pylint: disable=too-few-public-methods
 
 
 class Device:
-    def __init__(
-        self, mqtt_client: MQTTClient, device_mqtt_name: str, device_title: str, driver_name: str
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        mqtt_client: MQTTClient,
+        device_mqtt_name: str,
+        device_title: str,
+        driver_name: str,
+        log: logging.Logger = None,
     ) -> None:
         self._mqtt_client = mqtt_client
+        self._logger = log or logger
         self._base_topic = f"/devices/{device_mqtt_name}"
         self._device_title = device_title
         self._driver_name = driver_name
@@ -79,6 +88,10 @@ class Device:
     def get_controls_list(self) -> list[str]:
         return list(self._controls.keys())
 
+    def get_control_value(self, mqtt_control_name: str) -> str:
+        control = self._controls.get(mqtt_control_name)
+        return control.value if control else None
+
     def set_control_value(self, mqtt_control_name: str, value: str, force=False) -> None:
         if mqtt_control_name in self._controls:
             control = self._controls[mqtt_control_name]
@@ -86,7 +99,7 @@ class Device:
                 control.value = value
                 self._publish(self._get_control_base_topic(mqtt_control_name), value)
         else:
-            logging.debug("Can't set value of undeclared control %s", mqtt_control_name)
+            self._logger.debug("Can't set value of undeclared control %s", mqtt_control_name)
 
     def set_control_read_only(self, mqtt_control_name: str, read_only: bool) -> None:
         if mqtt_control_name in self._controls:
@@ -95,7 +108,7 @@ class Device:
                 control.meta.read_only = read_only
                 self._publish_control_meta(mqtt_control_name, control.meta)
         else:
-            logging.debug("Can't set readonly property of undeclared control %s", mqtt_control_name)
+            self._logger.debug("Can't set readonly property of undeclared control %s", mqtt_control_name)
 
     def set_control_title(self, mqtt_control_name: str, title: str) -> None:
         if mqtt_control_name in self._controls:
@@ -104,7 +117,7 @@ class Device:
                 control.meta.title = title
                 self._publish_control_meta(mqtt_control_name, control.meta)
         else:
-            logging.debug("Can't set title of undeclared control %s", mqtt_control_name)
+            self._logger.debug("Can't set title of undeclared control %s", mqtt_control_name)
 
     def set_control_error(self, mqtt_control_name: str, error: str) -> None:
         if mqtt_control_name in self._controls:
@@ -113,7 +126,7 @@ class Device:
                 control.meta.error = error
                 self._publish_control_meta(mqtt_control_name, control.meta)
         else:
-            logging.debug("Can't set error of undeclared control %s", mqtt_control_name)
+            self._logger.debug("Can't set error of undeclared control %s", mqtt_control_name)
 
     def add_control_message_callback(self, mqtt_control_name: str, callback: callable) -> None:
         if mqtt_control_name in self._controls:
@@ -121,7 +134,7 @@ class Device:
             self._mqtt_client.subscribe(control_base_topic + "/on")
             self._mqtt_client.message_callback_add(control_base_topic + "/on", callback)
         else:
-            logging.debug("Can't add message callback to undeclared control %s", mqtt_control_name)
+            self._logger.debug("Can't add message callback to undeclared control %s", mqtt_control_name)
 
     def _get_control_base_topic(self, mqtt_control_name: str) -> None:
         return f"{self._base_topic}/controls/{mqtt_control_name}"
@@ -142,13 +155,57 @@ class Device:
             self._publish(self._get_control_base_topic(mqtt_control_name) + "/meta", meta_json)
 
     def _publish(self, topic: str, value: str) -> None:
-        if value is None:
-            logging.debug('Clear "%s"', topic)
-        else:
-            logging.debug('Publish "%s" "%s"', topic, value)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            if value is None:
+                self._logger.debug('Clear "%s"', topic)
+            else:
+                self._logger.debug('Publish "%s" "%s"', topic, value, extra={"sample_key": topic})
         self._mqtt_client.publish(topic, value, retain=True)
 
 
+class ServiceDevice(abc.ABC):
+    """Driver's own device with a fixed MQTT id.
+
+    Subclasses set ``DEVICE_ID`` and ``DEVICE_TITLE``, create their controls in
+    ``_create_controls`` and subscribe on them in ``_subscribe_on_topics``.
+    """
+
+    DEVICE_ID = None
+    DEVICE_TITLE = None
+    DRIVER_NAME = "wb-mqtt-urri"
+
+    def __init__(self, mqtt_client: MQTTClient) -> None:
+        self._client = mqtt_client
+        self._device = None
+
+    def publicate(self) -> None:
+        self._device = Device(
+            mqtt_client=self._client,
+            device_mqtt_name=self.DEVICE_ID,
+            device_title=self.DEVICE_TITLE,
+            driver_name=self.DRIVER_NAME,
+        )
+        self._create_controls()
+        self._subscribe_on_topics()
+        logger.info("/devices/%s device created", self.DEVICE_ID)
+
+    def republish(self) -> None:
+        self._device.republish_device()
+        self._subscribe_on_topics()
+
+    def remove(self) -> None:
+        self._device.remove_device()
+        logger.info("/devices/%s device deleted", self.DEVICE_ID)
+
+    @abc.abstractmethod
+    def _create_controls(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def _subscribe_on_topics(self) -> None:
+        pass
+
+
 def retain_hack(mqtt_client) -> None:
     random.seed()
     retain_hack_topic = f"/wbretainhack/{random.random()}"
@@ -185,5 +242,5 @@ def remove_topics_by_device_prefix(mqtt_client, device_prefix: str) -> None:
     mqtt_client.message_callback_remove(devices_pattern)
 
     for topic in topics:
-        logging.debug("Clear old topic %s", topic)
+        logger.debug("Clear old topic %s", topic)
         mqtt_client.publish(topic, None, retain=True)